@@ -0,0 +1,106 @@
+"""
+Times the RDF -> Mermaid conversion on the bundled BirthDeath_Fortin.ttl and on a
+synthetic CIDOC-CRM graph of configurable size.
+
+    python -m CRITERIA.benchmark [--nodes 5000] [--repeat 5]
+"""
+
+import argparse
+import logging
+import os
+import random
+import time
+
+from rdflib import Graph
+
+from CRITERIA import criteria
+
+RDF_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "rdf")
+
+PREFIXES = """@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .
+@prefix frbroo: <http://iflastandards.info/ns/fr/frbr/frbroo/> .
+@prefix crmdig: <http://www.ics.forth.gr/isl/CRMext/CRMdig.rdfs/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+"""
+CLASSES = [
+    "crm:E21_Person",
+    "crm:E67_Birth",
+    "crm:E52_Time-Span",
+    "crm:E53_Place",
+    "crm:E55_Type",
+    "crm:E42_Identifier",
+    "crm:E22_Human-Made_Object",
+    "frbroo:F1_Work",
+    "crmdig:D1_Digital_Object",
+]
+PROPERTIES = [
+    "crm:P1_is_identified_by",
+    "crm:P2_has_type",
+    "crm:P4_has_time-span",
+    "crm:P7_took_place_at",
+    "crm:P14_carried_out_by",
+    "crm:P46_is_composed_of",
+]
+
+
+def synthetic(nodes, seed=0):
+    """Turtle for a random graph of about 5 triples per node."""
+    rnd = random.Random(seed)
+    lines = [PREFIXES]
+    for i in range(nodes):
+        uri = f"<https://example.org/node/{i}>"
+        lines.append(f"{uri} a {rnd.choice(CLASSES)} .")
+        if i % 7 == 0:
+            lines.append(f"{uri} a {rnd.choice(CLASSES)} .")
+        lines.append(f'{uri} rdfs:label "node {i}" .')
+        if i % 5 == 0:
+            lines.append(
+                f'{uri} crm:P82a_begin_of_the_begin "2020-01-01T00:00:00"^^xsd:dateTime .'
+            )
+        for _ in range(2):
+            target = rnd.randrange(nodes)
+            lines.append(f"{uri} {rnd.choice(PROPERTIES)} <https://example.org/node/{target}> .")
+    return "\n".join(lines) + "\n"
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None or elapsed < best else best
+    return best
+
+
+def run(name, turtle, repeat):
+    g = Graph()
+    g.parse(data=turtle, format="turtle")
+    print(f"{name}: {len(g)} triples")
+    print(f"  parse      {timed(lambda: Graph().parse(data=turtle, format='turtle'), repeat) * 1000:9.1f} ms")
+    print(f"  convert    {timed(lambda: criteria.convert(g), repeat) * 1000:9.1f} ms")
+    print(f"  instance   {timed(lambda: criteria.renderInstance(g), repeat) * 1000:9.1f} ms")
+    print(f"  ontology   {timed(lambda: criteria.renderOntology(g), repeat) * 1000:9.1f} ms")
+    criteria.ontology(turtle)
+    print(f"  cached     {timed(lambda: criteria.ontology(turtle), repeat) * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CRITERIA conversions")
+    parser.add_argument("--nodes", type=int, default=5000, help="synthetic graph size")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    criteria.classDict()
+    print(f"class index: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    with open(os.path.join(RDF_DIR, "BirthDeath_Fortin.ttl"), encoding="utf-8") as f:
+        run("BirthDeath_Fortin.ttl", f.read(), args.repeat)
+    run(f"synthetic ({args.nodes} nodes)", synthetic(args.nodes), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
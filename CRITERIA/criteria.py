@@ -1,16 +1,20 @@
+import hashlib
+import io
 import rdflib
 from rdflib import Graph, URIRef, Namespace, util
 from rdflib.namespace import NamespaceManager, RDFS, RDF, XSD
+import os
 import re
 import sys
 import argparse
-from CRITERIA.src import source
+import time
+from CRITERIA.src import source, batch, classindex, diagram, diagramcache, hierarchy, summary
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
 
 
-# Function to build a dictionary of an ontology's classes and their superclasses.
+# Function to build a dictionary of an ontology's classes and all their superclasses, closest first.
 # For instances, the returned object (clss) would look like this:
 # 	clss = {
 # 			'E21_Person': ['E39_Actor',
@@ -31,29 +35,26 @@ logging.basicConfig(level=logging.DEBUG)
 
 def superClass(ontology, prefix, baseURL):
     g = Graph()
-    g.parse("CRITERIA/src/ontologies/{}".format(ontology), format="xml")
-
-    ns = Namespace(baseURL)
-    g.bind(prefix, ns)
-    if baseURL != "http://www.cidoc-crm.org/cidoc-crm/":
-        crm = Namespace("http://www.cidoc-crm.org/cidoc-crm/")
-        g.bind("crm", crm)
+    g.parse(classindex.ontologyPath(ontology), format="xml")
 
+    h = hierarchy.ClassHierarchy(g)
     clss = {}
     for c in g.subjects(RDF.type, RDFS.Class):
-        spcList = []
-        l = 0  # l is the level/depth of the hierarchy
-        while l <= 9:
-            if l == 0:
-                sc = c
-            for spc in g.objects(sc, RDFS.subClassOf):
-                spcList.append(spc.n3(g.namespace_manager).split(":")[1])
-                sc = spc
-            l += 1
-        clss[c.n3(g.namespace_manager).split(":")[1]] = spcList
+        # closest superclasses first
+        dist = h.distances(c)
+        spcList = sorted(h.ancestors(c), key=lambda a: (dist[a], a))
+        clss[localName(c)] = [localName(spc) for spc in spcList]
     return clss
 
 
+# Local name of an ontology class, e.g. http://www.cidoc-crm.org/cidoc-crm/E21_Person -> E21_Person
+def localName(uri):
+    for ns in source.namespaces.values():
+        if uri.startswith(ns):
+            return uri[len(ns):]
+    return re.split("[/#]", uri)[-1]
+
+
 # Function to build a dictionary of an ontology's classes and their Mermaid classes, i.e. main CIDOC-CRM classes.
 # For instances, the returned object (d) would look like this:
 # d = {'E10_Transfer_of_Custody': 'Temporal_Entity',
@@ -63,91 +64,104 @@ def superClass(ontology, prefix, baseURL):
 # 	 'E20_Biological_Object': 'Physical_Thing',
 # 	 'E21_Person': 'Actor',
 # 	 'E22_Human-Made_Object': 'Physical_Thing'}
+# Every class gets the Mermaid class of its nearest superclass in source.classes, found in the
+# subclass closure of all the ontologies together (src/hierarchy.py), so FRBRoo and CRMdig classes
+# are resolved through all their CIDOC-CRM superclasses.
+# The dictionary only depends on the ontology files, so it is served from the
+# persisted index in src/classindex.py and only rebuilt when those files change.
 
 
 def classDict():
-    d = {}
-    classes = source.classes
-    # CIDOC-CRM
-    cidocClass = superClass(
-        source.onto["crm"], "crm", "http://www.cidoc-crm.org/cidoc-crm/"
-    )
-    for sc in cidocClass:
-        for spc in cidocClass[sc]:
-            # spc = spc.split(':')[1]
-            if spc in classes:
-                d[sc] = "_".join(spc.split("_")[1:])
-                break
-            # exit loop after the first superclass is found in the classes list.
-            # e.g. for 'E21_Person' the first superclass found in the classes list
-            # is E39_Actor
-    # FRBRoo
-    frbrClass = superClass(
-        source.onto["frbroo"], "frbroo", "http://iflastandards.info/ns/fr/frbr/frbroo/"
-    )
-    for fr in frbrClass:
-        crmSpc = frbrClass[fr][
-            -1
-        ]  # retrieve the last/highest cidoc-crm superclass of a frbroo class.
-        for spc in cidocClass[crmSpc]:
-            # spc = spc.split(':')[1]
-            if spc in classes:
-                d[fr] = "_".join(spc.split("_")[1:])
-                break
-    # CRMDig
-    digClass = superClass(
-        source.onto["crmdig"],
-        "crmdig",
-        "http://www.ics.forth.gr/isl/CRMext/CRMdig.rdfs/",
-    )
-    for dig in digClass:
-        crmSpc = digClass[dig][
-            -1
-        ]  # retrieve the last/highest cidoc-crm superclass of a crmdig class.
-        for spc in cidocClass[crmSpc]:
-            # spc = spc.split(':')[1]
-            if spc in classes:
-                d[dig] = "_".join(spc.split("_")[1:])
-                break
-    # CRMpc
-    pcClass = superClass(
-        source.onto["pc"], "crm", "http://www.cidoc-crm.org/cidoc-crm/"
-    )
-    for pc in pcClass:
-        d[pc] = "PC_Classes"
+    return classindex.load(buildClassDict)
 
-    for c in classes:
-        # d['crm:'+c] = '_'.join(c.split('_')[1:])
+
+def buildClassDict():
+    combined = Graph()
+    declared = {}  # ontology key -> classes declared in its file
+    for key in source.onto:
+        g = Graph()
+        g.parse(classindex.ontologyPath(source.onto[key]), format="xml")
+        declared[key] = set(g.subjects(RDF.type, RDFS.Class))
+        combined += g
+
+    h = hierarchy.ClassHierarchy(combined)
+    crm = Namespace(source.namespaces["crm"])
+    nearest = h.nearest([crm[c] for c in source.classes])
+
+    d = {}
+    for c in h.classes:
+        if c in nearest:
+            d[localName(c)] = "_".join(localName(nearest[c]).split("_")[1:])
+    for key, style in source.styles.items():
+        for c in declared.get(key, ()):
+            d[localName(c)] = style
+
+    for c in source.classes:
         d[c] = "_".join(c.split("_")[1:])
     return d
 
 
-# Function to convert RDF triples to Mermaid statements.
-# Returns a list of statements
-def convert(rdfInput):
-    if ".json" in rdfInput or ".jsonld" in rdfInput:
-        inFormat = util.guess_format(rdfInput, {"json": "json-ld", "jsonld": "json-ld"})
+# Function to load an RDF file into a graph, guessing the format from its extension.
+def graphFromFile(rdfFile):
+    if ".json" in rdfFile or ".jsonld" in rdfFile:
+        inFormat = util.guess_format(rdfFile, {"json": "json-ld", "jsonld": "json-ld"})
     else:
-        inFormat = util.guess_format(rdfInput)
+        inFormat = util.guess_format(rdfFile)
 
     g = Graph()
-    g.parse(rdfInput, format=inFormat)
+    g.parse(rdfFile, format=inFormat)
+    return g
+
+
+# Function to get a graph from the input of convert(), instance() and ontology().
+# The input is either an already parsed rdflib Graph, which is used as-is, or RDF text
+# (or an open text file) in the given format (Turtle by default), which is parsed in memory.
+def loadGraph(rdfInput, inFormat="turtle"):
+    if isinstance(rdfInput, Graph):
+        return rdfInput
+    if hasattr(rdfInput, "read"):
+        rdfInput = rdfInput.read()
+
+    g = Graph()
+    g.parse(data=rdfInput, format=inFormat)
+    return g
+
+
+# Function to read a Mermaid template from src/templates; each template is read once per process.
+_templates = {}
 
-    classes = classDict()
 
-    objList = []
-    stmtList = []
+def template(name):
+    if name not in _templates:
+        path = os.path.join(classindex.SRC_DIR, "templates", name)
+        with open(path, "r", encoding="utf-8") as f:
+            _templates[name] = f.read()
+    return _templates[name]
+
+
+# Generator of the typed edges (diagram.Edge) of a graph, built as the triples are visited, in triple order.
+# Only the URI -> node map and the set of typed URIs are kept between triples. With typesOnly, every triple
+# but the rdf:type ones is skipped (node ids then only count those triples).
+def edges(g, typesOnly=False):
+    nm = g.namespace_manager
+
+    classes = classDict()
 
-    uriDict = {}
-    stmtList = []
-    doubleInst = []  # to check for URI with double instantiations
+    predicates = {}  # predicate -> n3; there are few distinct ones
+    uriDict = {}  # URI -> Node, so that a resource keeps one node id across triples
+    typed = set()
     i = 0
     for s, p, o in g.triples((None, None, None)):
-        p = p.n3(g.namespace_manager)
+        if p not in predicates:
+            predicates[p] = p.n3(nm)
+        p = predicates[p]
+        if typesOnly and p != "rdf:type":
+            continue
+
         if s in uriDict:
             n1 = uriDict[s]
         else:
-            n1 = i
+            n1 = diagram.Node(i, s, s.n3(nm))
             i += 1
             if isinstance(s, rdflib.URIRef):
                 uriDict[s] = n1
@@ -155,7 +169,7 @@ def convert(rdfInput):
         if o in uriDict:
             n2 = uriDict[o]
         else:
-            n2 = i
+            n2 = diagram.Node(i, o, o.n3(nm))
             i += 1
             if isinstance(o, rdflib.URIRef) and p != "rdf:type":
                 uriDict[o] = n2
@@ -163,125 +177,146 @@ def convert(rdfInput):
         # check whether the object of the triple is a key in the returned dict of classDict
         # to retrieve the Mermaid class, i.e check for the object of the property rdf:type
         if p == "rdf:type":
-            c = o.n3(g.namespace_manager).split(":")[1]
-            if c in classes:
-                cl = classes[c]
-            else:
-                cl = "Default"
-            if not s in doubleInst:
-                doubleInst.append(s)
-                uriCl = cl + "_URI"
-            else:
-                uriCl = "Multi_URI"
-            stmt = "{}([{}]):::{} -->|{}| {}[{}]:::{}".format(
-                n1,
-                s.n3(g.namespace_manager),
-                uriCl,
-                p,
-                n2,
-                o.n3(g.namespace_manager),
-                cl,
-            )
-
-        elif '"' in o.n3(g.namespace_manager):
-            cl = "Literal"
-            stmt = "{}([{}]) -->|{}| {}([{}]):::{}".format(
-                n1, s.n3(g.namespace_manager), p, n2, o.n3(g.namespace_manager), cl
-            )
+            c = n2.text.split(":")[1]
+            cl = classes.get(c, "Default")
+            # a URI with several rdf:type statements is drawn as "Multi" after its first class
+            uriCl = cl + "_URI" if s not in typed else "Multi_URI"
+            typed.add(s)
+            yield diagram.Edge(diagram.TYPE, n1, p, n2, uriCl, cl)
+
+        elif '"' in n2.text:
+            yield diagram.Edge(diagram.LITERAL, n1, p, n2)
 
         else:
-            stmt = "{}([{}]) -->|{}| {}([{}])".format(
-                n1, s.n3(g.namespace_manager), p, n2, o.n3(g.namespace_manager)
-            )
-
-        stmtList.append(stmt)
-    return stmtList
-
-
-# Main function to convert a RDF turtle files to Mermaid with instances.
-def instance(rdfInput):
-    with open("temp.ttl", "w") as temp_f:
-        temp_f.write(rdfInput)
-
-    template = open("CRITERIA/src/templates/instance.mmd", "r", encoding="utf-8")
-    read = template.read()
-    out = ""
-    out += read
-
-    stmtList = convert("temp.ttl")
-
-    for stmt in stmtList:
-        stmt = stmt.replace('"', "''").replace("[", '["').replace("]", '"]')
-        stmt = stmt.replace('(["<', '(["').replace('>"])', '"])')
-        stmt = stmt.replace("|<", '|"').replace(">|", '"|').replace('--"', "-->")
-        out += f"{stmt}\n"
-
-    return out
-
-
-# Main function to convert a RDF turtle files to Mermaid, but only the classes represented, without the instances,
-# by replacing the uri with the classes in Mermaid statements.
-def ontology(rdfInput):
-    with open("temp.ttl", "w") as temp_f:
-        temp_f.write(rdfInput)
-
-    template = open("CRITERIA/src/templates/ontology.mmd", "r", encoding="utf-8")
-    read = template.read()
-    out = ""
-    out += read
-
-    uriType = {}
-    statements = []
-
-    stmtList = convert("temp.ttl")
-    for stmt in stmtList:
-        stmt = stmt.replace('"', "''").replace("[", '["').replace("]", '"]')
-        stmt = stmt.replace('(["<', "([").replace('>"])', "])")
-
-        date = re.findall('\(\[".*\^xsd:dateTime"]\)', stmt)
-        lit = re.findall("\(\[\"''.*''.*\"]\)", stmt)
-        if date:
-            stmt = stmt.replace(date[0], "[xsd:dateTime]")
-        elif lit:
-            stmt = stmt.replace(lit[0], "[rdfs:Literal]")
-        if "rdf:type" in stmt:
-            inst = re.findall("\(\[.*:.*\)", stmt)[0]  # get the uri part
-            clType = (
-                "[" + re.findall('\|.*\[".*"\].*', stmt)[0].split("[")[1]
-            )  # get the class part
-            # add to the uriType dict the uri part as the key, and the class part as the value
-            # so the class part will replace the uri part in the for loop below
-            if not inst in uriType:
-                uriType[inst] = clType
-            # else if uri is already in uriType, indicating multi instantiations,
-            # update the value of the 'inst' key by append the second class with <br> betwwen them
-            # so that all classes are in the same box/node
-            else:
-                clType = clType.split('["')[1].split("]")[0]
-                multi = uriType[inst].split('"]')[0] + "<br>" + clType + "]:::Multi"
-                uriType[inst] = multi
-
-        elif not "rdfs:label" in stmt:
-            statements.append(stmt)
-    # logging.debug(statements)
-    for stmt in statements:
-        key1 = re.findall("\(\[.*:.*\) ", stmt)[0].split(" ")[0]
-        stmt = stmt.replace(key1, uriType[key1])
-        key2 = re.findall("\(\[.*:.*\)", stmt)
-        if key2:
-            key2 = key2[0]
-            stmt = stmt.replace(key2, uriType[key2])
-        out += f"{stmt}\n"
-
-    return out
-
-
-def main(Type, rdf, mmd):
-    if Type == "instance":
-        instance(rdf, mmd)
-    elif Type == "ontology":
-        ontology(rdf, mmd)
+            yield diagram.Edge(diagram.LINK, n1, p, n2)
+
+
+# Function to convert RDF triples to a typed node/edge model of the Mermaid diagram.
+# Returns a diagram.Diagram, from which both the instance and the ontology views are rendered.
+def convert(rdfInput, inFormat="turtle"):
+    g = loadGraph(rdfInput, inFormat)
+
+    dgm = diagram.Diagram()
+    for edge in edges(g):
+        dgm.add(edge)
+    return dgm
+
+
+# Function to write a diagram ("instance" or "ontology") to a file-like sink, line by line as the
+# triples are visited, so neither the edges nor the output are ever held in memory as a whole.
+# The ontology view makes a first pass over the rdf:type triples, since instances are drawn as their classes.
+# Nothing is cached: this is meant for inputs too big for that (see instance() and ontology()).
+def stream(view, rdfInput, sink, inFormat="turtle"):
+    g = loadGraph(rdfInput, inFormat)
+
+    if view == "instance":
+        sink.write(template("instance.mmd"))
+        lines = diagram.instanceLines(edges(g))
+    elif view == "ontology":
+        sink.write(template("ontology.mmd"))
+        types = diagram.collectTypes(edges(g, typesOnly=True))
+        lines = diagram.ontologyLines(edges(g), types)
+    else:
+        raise ValueError(f"unknown diagram type: {view}")
+
+    for line in lines:
+        sink.write(line)
+        sink.write("\n")
+
+
+# Function to load the class index and the templates up front, so that a long-lived process
+# (web worker, batch worker, src/service.py) does not pay for them on its first conversion.
+def warm():
+    classDict()
+    for name in ("instance.mmd", "ontology.mmd"):
+        template(name)
+
+
+# Everything a rendered diagram depends on besides the RDF: the renderer, the class index and the template.
+def renderVersion(name):
+    classDict()
+    tpl = hashlib.sha256(template(name).encode("utf-8")).hexdigest()
+    return f"{diagram.VERSION}:{classindex.loadedDigest()}:{tpl}"
+
+
+# Largest diagram (in nodes and in edges) that callers passing budget=BUDGET get in full detail;
+# bigger ones are summarized (see src/summary.py). Set with CRITERIA_DIAGRAM_BUDGET.
+BUDGET = int(os.getenv("CRITERIA_DIAGRAM_BUDGET", "300"))
+
+
+# Function to render a diagram ("instance" or "ontology") as a string. Without a budget every statement
+# is drawn; with one, a diagram with more nodes or edges than the budget is drawn at a lower level of detail.
+def render(view, rdfInput, inFormat="turtle", budget=None):
+    out = io.StringIO()
+    if budget is None:
+        stream(view, rdfInput, out, inFormat)
+        return out.getvalue()
+
+    s, lines = summary.summarize(convert(rdfInput, inFormat), view, budget)
+    out.write(template(f"{view}.mmd"))
+    if s.summarized:
+        out.write(s.header() + "\n")
+    for line in lines:
+        out.write(line + "\n")
+    return out.getvalue()
+
+
+# Function to tell how a diagram would be drawn within a budget: returns a summary.Summary with the
+# level of detail, the size of the full and of the drawn diagram, and the node count of each cluster.
+def summarize(view, rdfInput, budget, inFormat="turtle"):
+    s, lines = summary.summarize(convert(rdfInput, inFormat), view, budget)
+    return s
+
+
+def renderInstance(rdfInput, inFormat="turtle", budget=None):
+    return render("instance", rdfInput, inFormat, budget)
+
+
+def renderOntology(rdfInput, inFormat="turtle", budget=None):
+    return render("ontology", rdfInput, inFormat, budget)
+
+
+def _cacheView(view, budget):
+    return view if budget is None else f"{view}@{budget}"
+
+
+# Main function to convert RDF (a Graph or Turtle text) to Mermaid with instances.
+# Diagrams are cached by content (see src/diagramcache.py); passing Turtle text rather than a
+# parsed Graph lets a cache hit skip parsing as well. See render() for the budget.
+def instance(rdfInput, inFormat="turtle", budget=None):
+    if hasattr(rdfInput, "read"):
+        rdfInput = rdfInput.read()
+    key = diagramcache.key(
+        _cacheView("instance", budget), rdfInput, inFormat, renderVersion("instance.mmd")
+    )
+    return diagramcache.cached(key, lambda: renderInstance(rdfInput, inFormat, budget))
+
+
+# Main function to convert RDF (a Graph or Turtle text) to Mermaid, but only the classes represented,
+# without the instances: each instance node is drawn as its class (or classes, for multiple instantiations).
+def ontology(rdfInput, inFormat="turtle", budget=None):
+    if hasattr(rdfInput, "read"):
+        rdfInput = rdfInput.read()
+    key = diagramcache.key(
+        _cacheView("ontology", budget), rdfInput, inFormat, renderVersion("ontology.mmd")
+    )
+    return diagramcache.cached(key, lambda: renderOntology(rdfInput, inFormat, budget))
+
+
+# Converts one RDF file to one Mermaid file or, if "rdf" is a directory or a glob pattern,
+# every RDF file it matches into a mirrored tree under the directory "mmd" (see src/batch.py).
+def main(Type, rdf, mmd, jobs=None):
+    if batch.isBatch(rdf):
+        start = time.perf_counter()
+        results = batch.run(Type, rdf, mmd, jobs)
+        failed = batch.summary(results, time.perf_counter() - start)
+        return 1 if failed else 0
+
+    g = graphFromFile(rdf)
+    with open(mmd, "w", encoding="utf-8") as f:
+        stream(Type, g, f)
     print("Success!")
+    return 0
 
 
 # argparse arguments
@@ -293,8 +328,21 @@ def parse_args():
     parser.add_argument(
         "Type", help="The type of the diagram", choices=["instance", "ontology"]
     )
-    parser.add_argument("rdf", help="RDF input filename including path_to_file")
-    parser.add_argument("mmd", help="Mermaid output filename including path_to_file")
+    parser.add_argument(
+        "rdf",
+        help="RDF input filename including path_to_file, or a directory or glob pattern of RDF files",
+    )
+    parser.add_argument(
+        "mmd",
+        help="Mermaid output filename including path_to_file, or the output directory for several files",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes for several files (default: one per CPU)",
+    )
 
     args = parser.parse_args()
     return args
@@ -302,4 +350,4 @@ def parse_args():
 
 if __name__ == "__main__":
     args = parse_args()
-    main(args.Type, args.rdf, args.mmd)
+    sys.exit(main(args.Type, args.rdf, args.mmd, args.jobs))
@@ -0,0 +1,117 @@
+"""
+Batch conversion: every RDF file under a directory (or matching a glob) is converted
+to Mermaid by a pool of worker processes, into a mirrored tree of .mmd files.
+
+    python -m CRITERIA.criteria ontology ./rdf ./mmd --jobs 8
+    python -m CRITERIA.criteria instance "./models/**/*.ttl" ./mmd
+
+Each worker loads the class index once, when it starts, rather than per file.
+"""
+
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Extensions picked up when the input is a directory
+EXTENSIONS = (".ttl", ".jsonld", ".json", ".nt", ".rdf", ".xml", ".n3", ".trig")
+
+
+class Result(object):
+    """Outcome of converting one file: output path (None on failure), seconds taken, error."""
+
+    __slots__ = ("source", "target", "seconds", "error")
+
+    def __init__(self, source, target, seconds, error=None):
+        self.source = source
+        self.target = target
+        self.seconds = seconds
+        self.error = error
+
+
+def isBatch(rdf):
+    return os.path.isdir(rdf) or glob.has_magic(rdf)
+
+
+def inputs(rdf):
+    """The files to convert, and the directory the output tree mirrors."""
+    if os.path.isdir(rdf):
+        files = []
+        for root, dirs, names in os.walk(rdf):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(EXTENSIONS):
+                    files.append(os.path.join(root, name))
+        return files, rdf
+    files = sorted(f for f in glob.glob(rdf, recursive=True) if os.path.isfile(f))
+    if not files:
+        return [], "."
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    return files, base
+
+
+def target(path, base, outDir):
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(base))
+    return os.path.join(outDir, os.path.splitext(rel)[0] + ".mmd")
+
+
+def _warm():
+    from CRITERIA import criteria
+
+    criteria.warm()
+
+
+def _initWorker():
+    # in the pool's processes only: the command's own logging is left alone
+    logging.disable(logging.INFO)
+    _warm()
+
+
+def convertFile(Type, path, out):
+    from CRITERIA import criteria
+
+    start = time.perf_counter()
+    tmp = out + ".part"
+    try:
+        g = criteria.graphFromFile(path)
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        # Lines are written as they are produced; the file only takes its name once complete.
+        with open(tmp, "w", encoding="utf-8") as f:
+            criteria.stream(Type, g, f)
+        os.replace(tmp, out)
+    except Exception as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        error = " ".join(str(e).split())  # one line per file in the summary
+        return Result(path, None, time.perf_counter() - start, f"{type(e).__name__}: {error}")
+    return Result(path, out, time.perf_counter() - start)
+
+
+def run(Type, rdf, outDir, jobs=None):
+    """Convert every input file; returns a list of Result in input order."""
+    files, base = inputs(rdf)
+    targets = [target(f, base, outDir) for f in files]
+    if jobs == 1 or len(files) <= 1:
+        _warm()
+        return [convertFile(Type, f, t) for f, t in zip(files, targets)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_initWorker) as pool:
+        futures = [pool.submit(convertFile, Type, f, t) for f, t in zip(files, targets)]
+        return [fut.result() for fut in futures]
+
+
+def summary(results, elapsed, out=None):
+    """Print one line per file, then the totals. Returns the number of failures."""
+    failed = [r for r in results if r.error]
+    for r in results:
+        if r.error:
+            print(f"FAIL  {r.seconds * 1000:8.1f} ms  {r.source}: {r.error}", file=out)
+        else:
+            print(f"ok    {r.seconds * 1000:8.1f} ms  {r.source} -> {r.target}", file=out)
+    busy = sum(r.seconds for r in results)
+    print(
+        f"{len(results) - len(failed)} converted, {len(failed)} failed, "
+        f"{elapsed:.2f} s elapsed ({busy:.2f} s of conversion)",
+        file=out,
+    )
+    return len(failed)
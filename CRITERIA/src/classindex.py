@@ -0,0 +1,132 @@
+"""
+Precompiled class-hierarchy index for the ontologies listed in source.onto.
+
+Building the class -> Mermaid class dictionary means parsing every RDFS file in
+src/ontologies with rdflib, which costs far more than converting a typical
+diagram. The result only depends on the ontology files (and the settings in source.py), so
+it is built once, persisted as JSON keyed by a content hash of those inputs, and
+kept in memory for the life of the process.
+
+The cache directory defaults to src/cache and can be moved with the
+CRITERIA_CACHE_DIR environment variable. If it cannot be written the index is
+simply rebuilt in memory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from CRITERIA.src import source
+
+# Bump whenever the way the index is built changes, so stale files are ignored.
+INDEX_VERSION = 2
+
+SRC_DIR = os.path.dirname(os.path.realpath(__file__))
+ONTOLOGY_DIR = os.path.join(SRC_DIR, "ontologies")
+CACHE_DIR = os.getenv("CRITERIA_CACHE_DIR", os.path.join(SRC_DIR, "cache"))
+
+_lock = threading.Lock()
+_signature = None
+_classes = None
+_key = None
+
+
+def ontologyPath(ontology):
+    return os.path.join(ONTOLOGY_DIR, ontology)
+
+
+def _ontologyPaths():
+    return [ontologyPath(source.onto[key]) for key in sorted(source.onto)]
+
+
+def _fileSignature():
+    # Cheap (stat only) fingerprint, used to notice an ontology file changing
+    # underneath a long-running process without re-hashing on every call.
+    sig = []
+    for path in _ontologyPaths():
+        st = os.stat(path)
+        sig.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def digest():
+    """Content hash of everything the index is derived from."""
+    h = hashlib.sha256()
+    h.update(f"v{INDEX_VERSION}\n".encode("utf-8"))
+    h.update(json.dumps(source.classes).encode("utf-8"))
+    h.update(json.dumps(source.namespaces, sort_keys=True).encode("utf-8"))
+    h.update(json.dumps(source.styles, sort_keys=True).encode("utf-8"))
+    for key in sorted(source.onto):
+        h.update(f"\n{key}={source.onto[key]}\n".encode("utf-8"))
+        with open(ontologyPath(source.onto[key]), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def indexPath(key):
+    return os.path.join(CACHE_DIR, f"classindex-{key}.json")
+
+
+def readIndex(key):
+    try:
+        with open(indexPath(key), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("digest") != key:
+        return None
+    return data.get("classes")
+
+
+def writeIndex(key, classes):
+    # Write to a temporary file and rename it into place, so that several
+    # worker processes building the index at once never see a partial file.
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=".classindex-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"digest": key, "classes": classes}, f)
+        os.replace(tmp, indexPath(key))
+    except OSError as e:
+        logging.warning("CRITERIA: could not persist class index: %s", e)
+
+
+def load(build):
+    """
+    Return the class dictionary, loading it from the persisted index if possible.
+    "build" is a callable returning a freshly computed dictionary; it is only called
+    when no index exists for the current ontology files.
+    """
+    global _signature, _classes, _key
+    sig = _fileSignature()
+    if _classes is not None and sig == _signature:
+        return _classes
+    with _lock:
+        if _classes is not None and sig == _signature:
+            return _classes
+        key = digest()
+        classes = readIndex(key)
+        if classes is None:
+            classes = build()
+            writeIndex(key, classes)
+        _signature = sig
+        _classes = classes
+        _key = key
+    return _classes
+
+
+def loadedDigest():
+    """digest() of the index currently in memory, or None before the first load()."""
+    return _key
+
+
+def clear():
+    """Forget the in-memory index (the persisted file is left alone)."""
+    global _signature, _classes, _key
+    with _lock:
+        _signature = None
+        _classes = None
+        _key = None
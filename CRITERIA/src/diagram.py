@@ -0,0 +1,207 @@
+"""
+Typed node/edge model of an RDF graph, as produced by criteria.edges() and
+criteria.convert(), and the two Mermaid views (instance and ontology) rendered from it.
+
+The views take any iterable of edges, so they can be fed straight from the
+generator while the triples are visited, without keeping the edges or the output.
+
+Node labels are the n3 form of the RDF term, escaped for Mermaid exactly as the
+original string-based implementation did, so the rendered diagrams are unchanged.
+"""
+
+# Bump whenever the rendered output changes, so cached diagrams are not reused.
+VERSION = 1
+
+TYPE = "type"
+LITERAL = "literal"
+LINK = "link"
+
+
+class Node(object):
+    """A subject or object of a triple, with the number it has in the diagram."""
+
+    __slots__ = ("id", "term", "text")
+
+    def __init__(self, id, term, text):
+        self.id = id
+        self.term = term
+        self.text = text  # n3 form of the term, using the graph's prefixes
+
+
+class Edge(object):
+    """
+    One triple. "kind" is TYPE for rdf:type statements, LITERAL when the object is a
+    literal, and LINK otherwise. Only TYPE edges carry Mermaid classes: the class of the
+    instance ("E39_Actor_URI", or "Multi_URI" for its second and later types) and of the class node.
+    """
+
+    __slots__ = ("kind", "subject", "predicate", "object", "subjectClass", "objectClass")
+
+    def __init__(self, kind, subject, predicate, object, subjectClass=None, objectClass=None):
+        self.kind = kind
+        self.subject = subject
+        self.predicate = predicate  # n3 form of the property
+        self.object = object
+        self.subjectClass = subjectClass
+        self.objectClass = objectClass
+
+
+class Diagram(object):
+    """
+    The edges of a converted graph in triple order, plus the types of each instance:
+        types = { term: [(class n3, Mermaid class), ...] }
+    in the order they were met.
+    """
+
+    def __init__(self):
+        self.edges = []
+        self.types = {}
+
+    def __len__(self):
+        return len(self.edges)
+
+    def add(self, edge):
+        if edge.kind == TYPE:
+            addType(self.types, edge)
+        self.edges.append(edge)
+
+
+def addType(types, edge):
+    types.setdefault(edge.subject.term, []).append((edge.object.text, edge.objectClass))
+
+
+def collectTypes(edges):
+    """The "types" mapping of a Diagram, from the TYPE edges among "edges"."""
+    types = {}
+    for edge in edges:
+        if edge.kind == TYPE:
+            addType(types, edge)
+    return types
+
+
+def _quote(text):
+    return text.replace('"', "''").replace("[", '["').replace("]", '"]')
+
+
+# Instance view ----------------------------------------------------------------
+
+
+def _instanceText(text):
+    text = _quote(text)
+    if "<" in text or ">" in text:
+        text = text.replace('(["<', '(["').replace('>"])', '"])')
+        text = text.replace("|<", '|"').replace(">|", '"|')
+    return text
+
+
+def instanceNode(node):
+    text = _instanceText(node.text)
+    if text[:1] == "<":
+        text = text[1:]
+    if text[-1:] == ">":
+        text = text[:-1]
+    return f'{node.id}(["{text}"])'
+
+
+def _instanceLabel(predicate):
+    text = _instanceText(predicate)
+    if text[:1] == "<":
+        text = '"' + text[1:]
+    if text[-1:] == ">":
+        text = text[:-1] + '"'
+    return text
+
+
+def instanceLine(edge):
+    label = _instanceLabel(edge.predicate)
+    if edge.kind == TYPE:
+        line = "{}:::{} -->|{}| {}[\"{}\"]:::{}".format(
+            instanceNode(edge.subject),
+            edge.subjectClass,
+            label,
+            edge.object.id,
+            _instanceText(edge.object.text),
+            edge.objectClass,
+        )
+    elif edge.kind == LITERAL:
+        line = "{} -->|{}| {}:::Literal".format(
+            instanceNode(edge.subject), label, instanceNode(edge.object)
+        )
+    else:
+        line = "{} -->|{}| {}".format(
+            instanceNode(edge.subject), label, instanceNode(edge.object)
+        )
+    # A "--" at the very end of a label closes up with the quote after it into an arrow,
+    # as it always has.
+    if '--"' in line:
+        line = line.replace('--"', "-->")
+    return line
+
+
+def instanceLines(edges):
+    for edge in edges:
+        yield instanceLine(edge)
+
+
+# Ontology view ----------------------------------------------------------------
+
+
+def _ontologyText(text):
+    text = _quote(text)
+    if "<" in text or ">" in text:
+        text = text.replace('(["<', "([").replace('>"])', "])")
+    return text
+
+
+def _ontologyRound(node):
+    text = _ontologyText(node.text)
+    start = "([" if text[:1] == "<" else '(["'
+    if start == "([":
+        text = text[1:]
+    if text[-1:] == ">":
+        return start + text[:-1] + "])"
+    return start + text + '"])'
+
+
+def ontologyNode(types, node):
+    """Replace an instance by its class(es); several classes share one "Multi" box."""
+    types = types.get(node.term)
+    if not types:
+        # Untyped resources have no class to show, so they keep their own label.
+        return _ontologyRound(node)
+    if len(types) == 1:
+        text, cl = types[0]
+        return '["{}"]:::{}'.format(_ontologyText(text), cl)
+    return '["{}"]:::Multi'.format("<br>".join(_ontologyText(t) for t, _ in types))
+
+
+def ontologyLiteral(node):
+    if node.text.endswith("^xsd:dateTime"):
+        return "[xsd:dateTime]:::Literal"
+    return "[rdfs:Literal]:::Literal"
+
+
+def ontologyLine(types, edge):
+    if edge.kind == LITERAL:
+        target = ontologyLiteral(edge.object)
+    else:
+        target = ontologyNode(types, edge.object)
+    return "{}{} -->|{}| {}{}".format(
+        edge.subject.id,
+        ontologyNode(types, edge.subject),
+        _ontologyText(edge.predicate),
+        edge.object.id,
+        target,
+    )
+
+
+def ontologyLines(edges, types):
+    """
+    "types" must already hold every instance's classes (Diagram.types or collectTypes()),
+    since a node can be drawn before the triple that types it is met.
+    """
+    # Classes replace instances, so rdf:type statements are not drawn; nor are labels.
+    for edge in edges:
+        if edge.kind == TYPE or edge.predicate == "rdfs:label":
+            continue
+        yield ontologyLine(types, edge)
@@ -0,0 +1,216 @@
+"""
+Content-addressed cache of rendered Mermaid diagrams.
+
+The same Turtle gets converted again and again: on every model page, on every
+call to /functions/ontology and /functions/instance, and for each section of a
+PDF export. A rendered diagram depends only on
+  - the RDF itself (Turtle text, or the triples and prefixes of a Graph),
+  - the view ("instance" or "ontology") and the input format,
+  - the "version" of the renderer (templates, class index, diagram.VERSION),
+so it is stored under a hash of those.
+
+There are two tiers:
+  - an in-memory LRU of CRITERIA_DIAGRAM_CACHE_SIZE entries (default 256; 0 turns
+    it off), private to the process;
+  - an optional on-disk tier in CRITERIA_DIAGRAM_CACHE_DIR, shared by all worker
+    processes. Unset by default.
+
+stats() returns hit/miss counters for both.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from rdflib import BNode, Graph
+
+MEMORY_SIZE = int(os.getenv("CRITERIA_DIAGRAM_CACHE_SIZE", "256"))
+DISK_DIR = os.getenv("CRITERIA_DIAGRAM_CACHE_DIR") or None
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_stats = {"hits": 0, "diskHits": 0, "misses": 0}
+
+
+def canonical(rdfInput):
+    """
+    Bytes identifying the RDF content independently of incidental formatting, or None
+    when that is too costly to find. Turtle text is taken with normalised line endings
+    and trailing whitespace removed, outside literals (see canonicalTurtle). A Graph is
+    taken by its prefix bindings (which the diagram labels use) and either its
+    "contentKey", a hash of the text it was parsed from (set by the code that parsed it,
+    e.g. ZellijData's FragmentCache, for graphs that can no longer change), or its sorted
+    triples. The triples only identify a graph without blank nodes: they are labelled at
+    random by the parser, and labelling them canonically costs far more than drawing the
+    diagram, so such graphs are not cached.
+    """
+    if isinstance(rdfInput, Graph):
+        nm = rdfInput.namespace_manager
+        lines = sorted(f"@prefix {p}: {ns.n3()} ." for p, ns in nm.namespaces())
+        lines.append("")
+        contentKey = getattr(rdfInput, "contentKey", None)
+        if contentKey:
+            lines.append(f"content {contentKey}")
+        else:
+            triples = []
+            for s, p, o in rdfInput:
+                if isinstance(s, BNode) or isinstance(o, BNode):
+                    return None
+                triples.append(f"{s.n3()} {p.n3()} {o.n3()} .")
+            lines.extend(sorted(triples))
+        return "\n".join(lines).encode("utf-8")
+    return canonicalTurtle(rdfInput).encode("utf-8")
+
+
+def canonicalTurtle(text):
+    """
+    text with line endings normalised and trailing whitespace removed, except in
+    literals (a multi-line literal keeps its text) and IRIs.
+    """
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            quote = c * 3 if text.startswith(c * 3, i) else c
+            j = i + len(quote)
+            while j < n and not text.startswith(quote, j):
+                if text[j] == "\\":
+                    j += 1
+                elif len(quote) == 1 and text[j] in "\r\n":
+                    break  # unterminated: the rest of the line is not in a literal
+                j += 1
+            if text.startswith(quote, j):
+                j += len(quote)
+            out.append(text[i:j])
+            i = j
+        elif c == "<":
+            j = text.find(">", i)
+            j = n if j < 0 else j + 1
+            out.append(text[i:j])
+            i = j
+        elif c == "#":
+            j = i
+            while j < n and text[j] not in "\r\n":
+                j += 1
+            out.append(text[i:j].rstrip())
+            i = j
+        elif c in " \t\r\n":
+            j = i
+            while j < n and text[j] in " \t\r\n":
+                j += 1
+            run = text[i:j].replace("\r\n", "\n").replace("\r", "\n")
+            if "\n" in run:
+                # newlines, and the indentation of the next line
+                run = "\n" * run.count("\n") + run.rsplit("\n", 1)[1]
+            out.append(run)
+            i = j
+        else:
+            j = i
+            while j < n and text[j] not in "\"'<# \t\r\n":
+                j += 1
+            out.append(text[i:j])
+            i = j
+    return "".join(out).strip()
+
+
+def key(view, rdfInput, inFormat, version):
+    """The cache key of a diagram, or None when rdfInput is not to be cached (see canonical)."""
+    content = canonical(rdfInput)
+    if content is None:
+        return None
+    h = hashlib.sha256()
+    h.update(f"{view}\n{inFormat}\n{version}\n".encode("utf-8"))
+    h.update(b"graph\n" if isinstance(rdfInput, Graph) else b"text\n")
+    h.update(content)
+    return h.hexdigest()
+
+
+def diskPath(key):
+    return os.path.join(DISK_DIR, key[:2], f"{key}.mmd")
+
+
+def _readDisk(key):
+    try:
+        with open(diskPath(key), "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _writeDisk(key, text):
+    # Same write-then-rename as classindex.writeIndex, so readers never see a partial file.
+    path = diskPath(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".diagram-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError as e:
+        logging.warning("CRITERIA: could not persist diagram: %s", e)
+
+
+def _remember(key, text):
+    if MEMORY_SIZE <= 0:
+        return
+    with _lock:
+        _memory[key] = text
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_SIZE:
+            _memory.popitem(last=False)
+
+
+def get(key):
+    """The cached diagram for "key", or None."""
+    with _lock:
+        text = _memory.get(key)
+        if text is not None:
+            _memory.move_to_end(key)
+            _stats["hits"] += 1
+            return text
+    if DISK_DIR:
+        text = _readDisk(key)
+        if text is not None:
+            with _lock:
+                _stats["diskHits"] += 1
+            _remember(key, text)
+            return text
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(key, text):
+    _remember(key, text)
+    if DISK_DIR:
+        _writeDisk(key, text)
+
+
+def cached(key, render):
+    """Return the diagram stored under "key", calling render() to produce it on a miss."""
+    if key is None:
+        return render()
+    text = get(key)
+    if text is None:
+        text = render()
+        put(key, text)
+    return text
+
+
+def stats():
+    with _lock:
+        out = dict(_stats)
+        out["size"] = len(_memory)
+    return out
+
+
+def clear():
+    """Empty the in-memory tier and reset the counters (the disk tier is left alone)."""
+    with _lock:
+        _memory.clear()
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,111 @@
+"""
+Transitive rdfs:subClassOf closure over one graph holding all the ontologies in
+source.onto, so that FRBRoo and CRMdig classes inherit through every CIDOC-CRM
+path they have, not just one.
+
+Classes are visited once, parents before children. Each class gets a map
+{ancestor: distance} built from its parents' maps, so ancestors(), distances()
+and the nearest-of-a-set lookup never walk the hierarchy again.
+"""
+
+from rdflib import URIRef
+from rdflib.namespace import RDF, RDFS
+
+
+class ClassHierarchy(object):
+    """
+    The subclass hierarchy of a graph:
+        h = ClassHierarchy(g)
+        h.ancestors(CRM.E21_Person)   # {E39_Actor, E20_Biological_Object, ..., E1_CRM_Entity}
+        h.nearest([CRM.E39_Actor, CRM.E18_Physical_Thing])[CRM.E21_Person]   # E39_Actor
+    A class counts as its own ancestor at distance 0.
+    """
+
+    def __init__(self, graph):
+        self.parents = {}
+        for c in graph.subjects(RDF.type, RDFS.Class):
+            if isinstance(c, URIRef):
+                self.parents.setdefault(c, [])
+        for c, p in graph.subject_objects(RDFS.subClassOf):
+            if isinstance(c, URIRef) and isinstance(p, URIRef) and c != p:
+                self.parents.setdefault(c, []).append(p)
+                self.parents.setdefault(p, [])
+        for c in self.parents:
+            self.parents[c] = sorted(set(self.parents[c]))
+        self.order = self._topological()
+        self._distances = None
+        self._nearest = {}
+
+    def __contains__(self, c):
+        return c in self.parents
+
+    def __len__(self):
+        return len(self.parents)
+
+    @property
+    def classes(self):
+        return self.order
+
+    def _topological(self):
+        # Iterative depth-first post-order over the parent links: every class comes
+        # after all of its superclasses. A (malformed) cycle is cut where it is met.
+        order = []
+        state = {}  # class -> 1 while on the stack, 2 once placed
+        for root in sorted(self.parents):
+            if root in state:
+                continue
+            stack = [(root, iter(self.parents[root]))]
+            state[root] = 1
+            while stack:
+                c, it = stack[-1]
+                for p in it:
+                    if p not in state:
+                        state[p] = 1
+                        stack.append((p, iter(self.parents[p])))
+                        break
+                else:
+                    stack.pop()
+                    state[c] = 2
+                    order.append(c)
+        return order
+
+    def distances(self, c):
+        """{ancestor: number of subClassOf steps on the shortest path}, including c itself."""
+        if self._distances is None:
+            self._distances = {}
+            for cls in self.order:
+                dist = {cls: 0}
+                for p in self.parents[cls]:
+                    for a, d in self._distances.get(p, {}).items():
+                        if a not in dist or d + 1 < dist[a]:
+                            dist[a] = d + 1
+                self._distances[cls] = dist
+        return self._distances.get(c, {c: 0})
+
+    def ancestors(self, c):
+        """Every (direct or indirect) superclass of c."""
+        return set(self.distances(c)) - {c}
+
+    def nearest(self, targets):
+        """
+        {class: closest of "targets" among the class and its superclasses}, for every class
+        that has one. Targets that are superclasses of another matching target are passed
+        over (E1_CRM_Entity is everyone's ancestor, often at a short distance, but never
+        the most specific answer); among the rest, the fewest steps win, then the target
+        listed first. Computed once per list of targets, so each lookup is a dict access.
+        """
+        targets = tuple(targets)
+        if targets not in self._nearest:
+            rank = {t: i for i, t in enumerate(targets)}
+            out = {}
+            for c in self.order:
+                dist = self.distances(c)
+                found = [a for a in dist if a in rank]
+                if not found:
+                    continue
+                above = set()
+                for a in found:
+                    above.update(b for b in self.distances(a) if b != a)
+                out[c] = min((dist[a], rank[a], a) for a in found if a not in above)[2]
+            self._nearest[targets] = out
+        return self._nearest[targets]
@@ -0,0 +1,142 @@
+"""
+Long-lived CRITERIA conversion service.
+
+The class index and the Mermaid templates are loaded once, when the service starts,
+so each request only pays for its own conversion (and nothing at all for a diagram
+already in src/diagramcache.py). Two transports:
+
+HTTP (default):
+    python -m CRITERIA.criteria-server --port 8765
+    POST /instance or /ontology with the RDF as the request body; the format is
+    taken from ?format=, else from the Content-Type (text/turtle, application/ld+json,
+    ...), else Turtle. Answers the Mermaid text, or 400 with the error message.
+    GET /health answers {"status": "ok", "cache": {...}} as JSON.
+
+stdin/stdout:
+    python -m CRITERIA.criteria-server --stdio
+    One JSON request per line, {"id": 1, "type": "ontology", "rdf": "...", "format": "turtle"},
+    answered by one JSON line, {"id": 1, "mmd": "..."} or {"id": 1, "error": "..."}.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from CRITERIA import criteria
+from CRITERIA.src import diagramcache
+
+TYPES = {"instance": criteria.instance, "ontology": criteria.ontology}
+
+# Content-Type -> rdflib format
+FORMATS = {
+    "text/turtle": "turtle",
+    "application/x-turtle": "turtle",
+    "application/ld+json": "json-ld",
+    "application/json": "json-ld",
+    "application/n-triples": "nt",
+    "application/rdf+xml": "xml",
+    "text/n3": "n3",
+    "application/trig": "trig",
+}
+
+
+def convert(Type, rdf, inFormat="turtle"):
+    if Type not in TYPES:
+        raise ValueError(f"unknown diagram type: {Type}")
+    return TYPES[Type](rdf, inFormat)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status, body, contentType="text/plain; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            body = json.dumps({"status": "ok", "cache": diagramcache.stats()})
+            self._send(200, body, "application/json")
+        else:
+            self._send(404, "not found")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        Type = url.path.strip("/")
+        if Type not in TYPES:
+            self._send(404, "not found")
+            return
+        query = parse_qs(url.query)
+        contentType = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        inFormat = query.get("format", [FORMATS.get(contentType, "turtle")])[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        rdf = self.rfile.read(length).decode("utf-8")
+        try:
+            self._send(200, convert(Type, rdf, inFormat))
+        except Exception as e:
+            self._send(400, f"{type(e).__name__}: {e}")
+
+    def log_message(self, format, *args):
+        logging.debug("CRITERIA service: " + format, *args)
+
+
+def serveHTTP(host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), Handler)
+    logging.info("CRITERIA service listening on http://%s:%s", host, server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def handle(request):
+    """Answer one stdio request (a dict) with a dict."""
+    out = {"id": request.get("id")}
+    try:
+        out["mmd"] = convert(
+            request.get("type", "ontology"), request["rdf"], request.get("format", "turtle")
+        )
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    return out
+
+
+def serveStdio(stdin=None, stdout=None):
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"id": None, "error": f"invalid request: {e}"}
+        else:
+            response = handle(request)
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-lived CRITERIA RDF to Mermaid service")
+    parser.add_argument("--stdio", action="store_true", help="Serve JSON lines on stdin/stdout instead of HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP interface (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="HTTP port (default: 8765)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    criteria.warm()
+    logging.info("CRITERIA service ready in %.0f ms", (time.perf_counter() - start) * 1000)
+
+    if args.stdio:
+        serveStdio()
+    else:
+        serveHTTP(args.host, args.port)
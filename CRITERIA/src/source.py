@@ -19,3 +19,16 @@ onto = {
     "frbroo": "FRBR2.4-draft.rdfs",
     "crmdig": "CRMdig_v3.2.2.rdfs",
 }
+
+# Namespaces of the classes in each ontology file
+namespaces = {
+    "crm": "http://www.cidoc-crm.org/cidoc-crm/",
+    "pc": "http://www.cidoc-crm.org/cidoc-crm/",
+    "frbroo": "http://iflastandards.info/ns/fr/frbr/frbroo/",
+    "crmdig": "http://www.ics.forth.gr/isl/CRMext/CRMdig.rdfs/",
+}
+
+# Ontologies whose classes all share one Mermaid class, whatever their superclasses
+styles = {
+    "pc": "PC_Classes",
+}
@@ -0,0 +1,205 @@
+"""
+Level-of-detail rendering for diagrams too big to draw.
+
+Mermaid in the browser (and mermaid.ink for the PDF export) chokes on diagrams with
+thousands of nodes. Given a budget, the first of these levels whose diagram has no
+more nodes and no more edges than the budget is drawn:
+
+    FULL      every statement, as without a budget
+    LITERALS  the literal values of each resource collapsed into one node, with a count
+    CLUSTERS  resources grouped by their styled class (source.classes, e.g. "Actor"),
+              one edge per class, property and class, with the number of statements
+    CLASSES   one edge per pair of styled classes, with the number of statements
+
+CLASSES is drawn when nothing else fits; it has at most one node per styled class.
+A summarized diagram starts with a "%% CRITERIA summary: ..." comment line (see Summary).
+"""
+
+from CRITERIA.src import diagram
+
+FULL = "full"
+LITERALS = "literals"
+CLUSTERS = "clusters"
+CLASSES = "classes"
+LEVELS = (FULL, LITERALS, CLUSTERS, CLASSES)
+
+
+class Summary(object):
+    """
+    How a diagram was drawn: the level, the size of the full diagram and of the one drawn,
+    and, from CLUSTERS on, the number of nodes in each cluster:
+        clusters = { "Actor": 12, "Literal": 40, ... }
+    """
+
+    def __init__(self, level, nodes, edges, shownNodes, shownEdges, clusters=None):
+        self.level = level
+        self.nodes = nodes
+        self.edges = edges
+        self.shownNodes = shownNodes
+        self.shownEdges = shownEdges
+        self.clusters = clusters or {}
+
+    @property
+    def summarized(self):
+        return self.level != FULL
+
+    def header(self):
+        return "%% CRITERIA summary: {}, {} of {} nodes and {} of {} edges drawn".format(
+            self.level, self.shownNodes, self.nodes, self.shownEdges, self.edges
+        )
+
+
+def drawnEdges(dgm, view):
+    """The edges the full diagram draws: all of them in the instance view; no types or labels in the ontology view."""
+    if view == "instance":
+        return list(dgm.edges)
+    return [e for e in dgm.edges if e.kind != diagram.TYPE and e.predicate != "rdfs:label"]
+
+
+def _label(text):
+    # Quoted Mermaid edge or node text; quotes and angle brackets would end it early.
+    return '"' + text.replace('"', "''").replace("<", "").replace(">", "") + '"'
+
+
+def _clusterOf(types, node, kind=None):
+    if kind == diagram.LITERAL:
+        return "Literal"
+    t = types.get(node.term)
+    if not t:
+        return "Default"
+    if len(t) > 1:
+        return "Multi"
+    return t[0][1]
+
+
+def _style(cluster, view):
+    if cluster == "Default":
+        return ""
+    if view == "instance" and cluster != "Literal":
+        return f":::{cluster}_URI"
+    return f":::{cluster}"
+
+
+# FULL -------------------------------------------------------------------------
+
+
+def _fullSize(edges):
+    ids = set()
+    for e in edges:
+        ids.add(e.subject.id)
+        ids.add(e.object.id)
+    return len(ids), len(edges)
+
+
+def _fullLines(dgm, view, edges):
+    if view == "instance":
+        return diagram.instanceLines(edges)
+    return diagram.ontologyLines(edges, dgm.types)
+
+
+# LITERALS ---------------------------------------------------------------------
+
+
+def _literalGroups(edges):
+    # subject id -> number of literal edges, in the order the subjects are met
+    groups = {}
+    for e in edges:
+        if e.kind == diagram.LITERAL:
+            groups[e.subject.id] = groups.get(e.subject.id, 0) + 1
+    return groups
+
+
+def _literalsSize(edges):
+    groups = _literalGroups(edges)
+    ids = set()
+    count = 0
+    for e in edges:
+        if e.kind == diagram.LITERAL:
+            ids.add(e.subject.id)
+        else:
+            ids.add(e.subject.id)
+            ids.add(e.object.id)
+            count += 1
+    return len(ids) + len(groups), count + len(groups)
+
+
+def _literalsLines(dgm, view, edges):
+    groups = _literalGroups(edges)
+    done = set()
+    for e in edges:
+        if e.kind != diagram.LITERAL:
+            if view == "instance":
+                yield diagram.instanceLine(e)
+            else:
+                yield diagram.ontologyLine(dgm.types, e)
+            continue
+        s = e.subject
+        if s.id in done:
+            continue
+        done.add(s.id)
+        n = groups[s.id]
+        node = diagram.instanceNode(s) if view == "instance" else f"{s.id}{diagram.ontologyNode(dgm.types, s)}"
+        yield "{} -->|{}| L{}[{}]:::Literal".format(
+            node, _label(f"{n} literal values"), s.id, _label(f"rdfs:Literal ({n})")
+        )
+
+
+# CLUSTERS and CLASSES ---------------------------------------------------------
+
+
+def _clusters(dgm, edges, byPredicate):
+    """(cluster node counts, {(cluster, [predicate,] cluster): number of statements}), in order met."""
+    members = {}
+    links = {}
+    for e in edges:
+        if e.kind == diagram.TYPE:
+            continue
+        cs = _clusterOf(dgm.types, e.subject)
+        co = _clusterOf(dgm.types, e.object, e.kind)
+        members.setdefault(cs, set()).add(e.subject.id)
+        members.setdefault(co, set()).add(e.object.id)
+        key = (cs, e.predicate, co) if byPredicate else (cs, co)
+        links[key] = links.get(key, 0) + 1
+    return {c: len(ids) for c, ids in members.items()}, links
+
+
+def _clusterLines(view, counts, links):
+    ids = {c: f"C{i}" for i, c in enumerate(counts)}
+
+    def node(c):
+        return "{}[{}]{}".format(ids[c], _label(f"{c} ({counts[c]})"), _style(c, view))
+
+    for key, n in links.items():
+        if len(key) == 3:
+            label = f"{key[1]} ({n})"
+        else:
+            label = f"{n} statements"
+        yield "{} -->|{}| {}".format(node(key[0]), _label(label), node(key[-1]))
+
+
+def summarize(dgm, view, budget):
+    """
+    Pick the level of detail for a diagram.Diagram in "view" ("instance" or "ontology").
+    Returns (Summary, iterable of Mermaid lines); the lines of a FULL summary are the
+    normal ones, unchanged.
+    """
+    edges = drawnEdges(dgm, view)
+    nodes, count = _fullSize(edges)
+
+    def fits(size):
+        return budget is None or (size[0] <= budget and size[1] <= budget)
+
+    if fits((nodes, count)):
+        return Summary(FULL, nodes, count, nodes, count), _fullLines(dgm, view, edges)
+
+    size = _literalsSize(edges)
+    if fits(size):
+        return Summary(LITERALS, nodes, count, *size), _literalsLines(dgm, view, edges)
+
+    counts, links = _clusters(dgm, edges, byPredicate=True)
+    level = CLUSTERS
+    if not fits((len(counts), len(links))):
+        counts, links = _clusters(dgm, edges, byPredicate=False)
+        level = CLASSES
+    summary = Summary(level, nodes, count, len(counts), len(links), counts)
+    return summary, _clusterLines(view, counts, links)
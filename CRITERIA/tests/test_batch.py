@@ -0,0 +1,61 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from CRITERIA import criteria
+from CRITERIA.src import batch
+
+RDF_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "rdf")
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmp, "rdf")
+        os.makedirs(os.path.join(self.src, "sub"))
+        example = os.path.join(RDF_DIR, "BirthDeath_Fortin.ttl")
+        shutil.copy(example, os.path.join(self.src, "a.ttl"))
+        shutil.copy(example, os.path.join(self.src, "sub", "b.ttl"))
+        with open(os.path.join(self.src, "sub", "bad.ttl"), "w") as f:
+            f.write("not turtle .\n")
+        with open(os.path.join(self.src, "notes.txt"), "w") as f:
+            f.write("ignored\n")
+        self.out = os.path.join(self.tmp, "mmd")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def check(self, results):
+        byName = {os.path.basename(r.source): r for r in results}
+        self.assertEqual(sorted(byName), ["a.ttl", "b.ttl", "bad.ttl"])
+        self.assertIn("BadSyntax", byName["bad.ttl"].error)
+        self.assertEqual(byName["b.ttl"].target, os.path.join(self.out, "sub", "b.mmd"))
+        with open(byName["b.ttl"].target, encoding="utf-8") as f:
+            self.assertTrue(f.read().startswith("graph TD"))
+
+    def test_Directory(self):
+        self.check(batch.run("ontology", self.src, self.out, jobs=1))
+
+    def test_InProcessKeepsLogging(self):
+        batch.run("ontology", self.src, self.out, jobs=1)
+        self.assertLess(logging.root.manager.disable, logging.INFO)
+
+    def test_ProcessPool(self):
+        self.check(batch.run("instance", self.src, self.out, jobs=2))
+
+    def test_Glob(self):
+        results = batch.run("ontology", os.path.join(self.src, "**", "*.ttl"), self.out, jobs=1)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(os.path.isfile(os.path.join(self.out, "a.mmd")))
+
+    def test_MainReportsFailures(self):
+        self.assertEqual(criteria.main("ontology", self.src, self.out, jobs=1), 1)
+        single = os.path.join(self.tmp, "a.mmd")
+        self.assertEqual(criteria.main("instance", os.path.join(self.src, "a.ttl"), single), 0)
+        self.assertTrue(os.path.isfile(single))
+
+
+if __name__ == "__main__":
+    unittest.main()
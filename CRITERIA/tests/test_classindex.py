@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from CRITERIA import criteria
+from CRITERIA.src import classindex
+
+
+class TestClassIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.ontologies = os.path.join(self.tmp, "ontologies")
+        shutil.copytree(classindex.ONTOLOGY_DIR, self.ontologies)
+        self.saved = (classindex.ONTOLOGY_DIR, classindex.CACHE_DIR)
+        classindex.ONTOLOGY_DIR = self.ontologies
+        classindex.CACHE_DIR = os.path.join(self.tmp, "cache")
+        classindex.clear()
+        self.builds = 0
+
+    def tearDown(self):
+        classindex.ONTOLOGY_DIR, classindex.CACHE_DIR = self.saved
+        classindex.clear()
+        shutil.rmtree(self.tmp)
+
+    def build(self):
+        self.builds += 1
+        return criteria.buildClassDict()
+
+    def test_PersistedAndReloaded(self):
+        first = classindex.load(self.build)
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(first["E21_Person"], "Actor")
+        self.assertTrue(os.path.isfile(classindex.indexPath(classindex.digest())))
+
+        # A new process only has the file on disk to go on.
+        classindex.clear()
+        self.assertEqual(classindex.load(self.build), first)
+        self.assertEqual(self.builds, 1)
+
+    def test_RebuiltWhenOntologyChanges(self):
+        classindex.load(self.build)
+        before = classindex.digest()
+
+        path = classindex.ontologyPath(criteria.source.onto["pc"])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n<!-- changed -->\n")
+        os.utime(path, ns=(0, 0))
+
+        classindex.load(self.build)
+        self.assertNotEqual(classindex.digest(), before)
+        self.assertEqual(self.builds, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
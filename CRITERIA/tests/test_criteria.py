@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+import unittest
+
+from rdflib import Graph
+
+from CRITERIA import criteria
+
+RDF_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "rdf")
+
+
+class TestCriteria(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(RDF_DIR, "BirthDeath_Fortin.ttl"), encoding="utf-8") as f:
+            self.turtle = f.read()
+
+    def test_GraphAndTextGiveSameDiagram(self):
+        g = Graph()
+        g.parse(data=self.turtle, format="turtle")
+        self.assertEqual(criteria.instance(g), criteria.instance(self.turtle))
+        self.assertEqual(criteria.ontology(g), criteria.ontology(self.turtle))
+
+    def test_UntypedNodes(self):
+        turtle = (
+            "@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .\n"
+            "<https://example.org/a> a crm:E21_Person ;\n"
+            "    crm:P1_is_identified_by <https://example.org/b> .\n"
+            '<https://example.org/b> crm:P190_has_symbolic_content "B" .\n'
+        )
+        ontology = criteria.ontology(turtle)
+        self.assertIn(':::Actor -->|crm:P1_is_identified_by| ', ontology)
+        self.assertIn("([https://example.org/b])", ontology)
+        self.assertIn("[rdfs:Literal]:::Literal", ontology)
+        self.assertIn(":::Actor_URI -->|rdf:type| ", criteria.instance(turtle))
+
+    def test_StreamMatchesString(self):
+        for view, render in (("instance", criteria.renderInstance), ("ontology", criteria.renderOntology)):
+            g = Graph()
+            g.parse(data=self.turtle, format="turtle")
+            sink = io.StringIO()
+            criteria.stream(view, g, sink)
+            self.assertEqual(sink.getvalue(), render(g))
+
+    def test_NoFilesystemWrites(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                criteria.ontology(self.turtle)
+                criteria.instance(self.turtle)
+                self.assertEqual(os.listdir(tmp), [])
+            finally:
+                os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from rdflib import Graph
+
+from CRITERIA import criteria
+from CRITERIA.src import diagramcache
+
+RDF_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "rdf")
+
+
+class TestDiagramCache(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(RDF_DIR, "BirthDeath_Fortin.ttl"), encoding="utf-8") as f:
+            self.turtle = f.read()
+        self.tmp = tempfile.mkdtemp()
+        self.saved = (diagramcache.DISK_DIR, diagramcache.MEMORY_SIZE)
+        diagramcache.clear()
+
+    def tearDown(self):
+        diagramcache.DISK_DIR, diagramcache.MEMORY_SIZE = self.saved
+        diagramcache.clear()
+        shutil.rmtree(self.tmp)
+
+    def test_MemoryHit(self):
+        first = criteria.ontology(self.turtle)
+        # Different line endings and trailing blanks are the same Turtle.
+        again = criteria.ontology(self.turtle.replace("\n", "  \r\n"))
+        self.assertEqual(first, again)
+        self.assertEqual(first, criteria.renderOntology(self.turtle))
+        self.assertEqual(diagramcache.stats()["misses"], 1)
+        self.assertEqual(diagramcache.stats()["hits"], 1)
+
+        # The view is part of the key.
+        criteria.instance(self.turtle)
+        self.assertEqual(diagramcache.stats()["misses"], 2)
+
+    def test_GraphKeyIgnoresTripleOrder(self):
+        g1 = Graph()
+        g1.parse(data=self.turtle, format="turtle")
+        g2 = Graph()
+        g2.namespace_manager = g1.namespace_manager
+        for t in sorted(g1, reverse=True):
+            g2.add(t)
+        self.assertEqual(
+            diagramcache.key("ontology", g1, "turtle", "v"),
+            diagramcache.key("ontology", g2, "turtle", "v"),
+        )
+        # Prefixes show in the diagram labels, so they are part of the key.
+        g3 = Graph()
+        g3.parse(data=self.turtle, format="turtle")
+        g3.bind("other", "https://example.org/")
+        self.assertNotEqual(
+            diagramcache.key("ontology", g1, "turtle", "v"),
+            diagramcache.key("ontology", g3, "turtle", "v"),
+        )
+
+    def test_BlankNodeGraphs(self):
+        turtle = "@prefix ex: <https://example.org/> .\n" + "".join(
+            f'ex:a{i} ex:p [ ex:q [ ex:r "v{i}" ] ] .\n' for i in range(1500)
+        )
+        g1 = Graph().parse(data=turtle, format="turtle")
+        started = time.perf_counter()
+        # not cached: labelling blank nodes canonically costs more than drawing them
+        self.assertIsNone(diagramcache.key("ontology", g1, "turtle", "v"))
+        self.assertLess(time.perf_counter() - started, 1)
+
+        # unless the graph says what it was parsed from
+        g2 = Graph().parse(data=turtle, format="turtle")
+        g1.contentKey = g2.contentKey = "fields"
+        self.assertEqual(
+            diagramcache.key("ontology", g1, "turtle", "v"),
+            diagramcache.key("ontology", g2, "turtle", "v"),
+        )
+        renders = []
+        for g in (g1, g2):
+            diagramcache.cached(diagramcache.key("ontology", g, "turtle", "v"), lambda: renders.append(g) or "graph")
+        self.assertEqual(len(renders), 1)
+
+    def test_TextKeyKeepsLiterals(self):
+        turtle = '<https://example.org/a> <https://example.org/p> """one  \ntwo""" .'
+        self.assertNotEqual(
+            diagramcache.key("ontology", turtle, "turtle", "v"),
+            diagramcache.key("ontology", turtle.replace("one  ", "one"), "turtle", "v"),
+        )
+        self.assertEqual(
+            diagramcache.key("ontology", turtle, "turtle", "v"),
+            diagramcache.key("ontology", turtle + "  \r\n", "turtle", "v"),
+        )
+
+    def test_DiskTierSharedAcrossProcesses(self):
+        diagramcache.DISK_DIR = self.tmp
+        first = criteria.instance(self.turtle)
+
+        # Another worker starts with an empty memory tier.
+        diagramcache.clear()
+        self.assertEqual(criteria.instance(self.turtle), first)
+        self.assertEqual(diagramcache.stats()["diskHits"], 1)
+        self.assertEqual(diagramcache.stats()["misses"], 0)
+
+    def test_LRUEviction(self):
+        diagramcache.MEMORY_SIZE = 2
+        for i in range(3):
+            diagramcache.put(str(i), f"graph {i}")
+        self.assertIsNone(diagramcache.get("0"))
+        self.assertEqual(diagramcache.get("2"), "graph 2")
+        self.assertEqual(diagramcache.stats()["size"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
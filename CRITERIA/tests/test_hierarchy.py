@@ -0,0 +1,64 @@
+import unittest
+
+from rdflib import Graph, Namespace
+
+from CRITERIA import criteria
+from CRITERIA.src.hierarchy import ClassHierarchy
+
+EX = Namespace("https://example.org/")
+
+TURTLE = """
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix : <https://example.org/> .
+
+:Root a rdfs:Class .
+:Thing rdfs:subClassOf :Root .
+:Agent rdfs:subClassOf :Root .
+:Place rdfs:subClassOf :Thing .
+:Person rdfs:subClassOf :Agent, :Body .
+:Body rdfs:subClassOf :Thing .
+:Author rdfs:subClassOf :Person .
+:Settlement rdfs:subClassOf :Place, :Shortcut .
+:Shortcut rdfs:subClassOf :Root .
+"""
+
+
+class TestClassHierarchy(unittest.TestCase):
+    def setUp(self):
+        g = Graph()
+        g.parse(data=TURTLE, format="turtle")
+        self.h = ClassHierarchy(g)
+
+    def test_AncestorsFollowEveryParent(self):
+        self.assertEqual(
+            self.h.ancestors(EX.Author),
+            {EX.Person, EX.Agent, EX.Body, EX.Thing, EX.Root},
+        )
+        self.assertEqual(self.h.distances(EX.Author)[EX.Thing], 3)
+        self.assertEqual(self.h.ancestors(EX.Root), set())
+
+    def test_ParentsBeforeChildren(self):
+        order = self.h.classes
+        for c in order:
+            for p in self.h.parents[c]:
+                self.assertLess(order.index(p), order.index(c))
+
+    def test_Nearest(self):
+        nearest = self.h.nearest([EX.Thing, EX.Agent, EX.Root])
+        self.assertEqual(nearest[EX.Author], EX.Agent)
+        self.assertEqual(nearest[EX.Thing], EX.Thing)
+        # Root is one step away through Shortcut, but Thing is more specific.
+        self.assertEqual(nearest[EX.Settlement], EX.Thing)
+        self.assertEqual(nearest[EX.Shortcut], EX.Root)
+
+    def test_ClassDictFollowsCrmPaths(self):
+        d = criteria.buildClassDict()
+        self.assertEqual(d["E21_Person"], "Actor")
+        self.assertEqual(d["F9_Place"], "Place")
+        self.assertEqual(d["F12_Nomen"], "Appellation")
+        self.assertEqual(d["D9_Data_Object"], "Conceptual_Object")
+        self.assertEqual(d["PC14_carried_out_by"], "PC_Classes")
+
+
+if __name__ == "__main__":
+    unittest.main()
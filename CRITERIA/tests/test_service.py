@@ -0,0 +1,55 @@
+import io
+import json
+import os
+import threading
+import unittest
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+from CRITERIA import criteria
+from CRITERIA.src import service
+
+RDF_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "rdf")
+
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(RDF_DIR, "BirthDeath_Fortin.ttl"), encoding="utf-8") as f:
+            self.turtle = f.read()
+        criteria.warm()
+
+    def test_Stdio(self):
+        requests = [
+            {"id": 1, "type": "ontology", "rdf": self.turtle},
+            {"id": 2, "type": "instance", "rdf": "not turtle ."},
+        ]
+        stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+        stdout = io.StringIO()
+        service.serveStdio(stdin, stdout)
+        first, second = [json.loads(ln) for ln in stdout.getvalue().splitlines()]
+        self.assertEqual(first, {"id": 1, "mmd": criteria.ontology(self.turtle)})
+        self.assertEqual(second["id"], 2)
+        self.assertIn("BadSyntax", second["error"])
+
+    def test_HTTP(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), service.Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/instance"
+            req = urllib.request.Request(
+                url, data=self.turtle.encode("utf-8"), headers={"Content-Type": "text/turtle"}
+            )
+            with urllib.request.urlopen(req) as resp:
+                self.assertEqual(resp.read().decode("utf-8"), criteria.instance(self.turtle))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_FileInput(self):
+        with open(os.path.join(RDF_DIR, "BirthDeath_Fortin.ttl"), encoding="utf-8") as f:
+            self.assertEqual(criteria.ontology(f), criteria.ontology(self.turtle))
+
+
+if __name__ == "__main__":
+    unittest.main()
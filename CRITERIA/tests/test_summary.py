@@ -0,0 +1,49 @@
+import os
+import unittest
+
+from CRITERIA import criteria
+from CRITERIA.benchmark import synthetic
+from CRITERIA.src import summary
+
+RDF_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "rdf")
+
+
+class TestSummary(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(RDF_DIR, "BirthDeath_Fortin.ttl"), encoding="utf-8") as f:
+            self.turtle = f.read()
+
+    def test_FullWithinBudget(self):
+        for view in ("instance", "ontology"):
+            self.assertEqual(
+                criteria.render(view, self.turtle, budget=1000), criteria.render(view, self.turtle)
+            )
+            self.assertEqual(criteria.summarize(view, self.turtle, 1000).level, summary.FULL)
+
+    def test_LevelsShrinkWithBudget(self):
+        levels = [criteria.summarize("ontology", self.turtle, b).level for b in (13, 11, 8)]
+        self.assertEqual(levels, [summary.FULL, summary.LITERALS, summary.CLUSTERS])
+
+        s = criteria.summarize("instance", self.turtle, 12)
+        self.assertEqual(s.level, summary.CLUSTERS)
+        self.assertEqual(s.clusters["Actor"], 3)
+        self.assertLessEqual(s.shownEdges, 12)
+
+    def test_BoundedOutput(self):
+        big = synthetic(2000)
+        for view in ("instance", "ontology"):
+            text = criteria.render(view, big, budget=100)
+            self.assertIn("%% CRITERIA summary: classes", text)
+            body = text[len(criteria.template(f"{view}.mmd")):]
+            # the summary line, then one line per pair of clusters
+            self.assertLess(len(body.splitlines()), 100)
+
+    def test_BudgetIsPartOfCacheKey(self):
+        full = criteria.ontology(self.turtle)
+        summarized = criteria.ontology(self.turtle, budget=8)
+        self.assertNotEqual(full, summarized)
+        self.assertEqual(criteria.ontology(self.turtle), full)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,31 +5,54 @@ Created on Mar. 9, 2021
 """
 
 import logging
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 from urllib.parse import unquote_plus, urlparse
 
-from pyairtable import Api
 from pyairtable.api import Table
-from pyairtable.formulas import EQ, OR, Compound, FunctionCall
+from pyairtable.formulas import EQ, Compound, Field, FunctionCall
+from requests import HTTPError
 
 from website.db import decrypt, generate_airtable_schema
+from ZellijData import RecordCache, RecordIndex
+from ZellijData.RateLimiter import RateLimitedApi
+from ZellijData.RecordIndex import isRecordId
 from ZellijData.SingleGroupedItem import SingleGroupedItem
 
 logging.basicConfig(level=logging.DEBUG)
 
+# Longest formula sent to AirTable when fetching records by id, and how many such
+# requests are made at once.
+FORMULA_LIMIT = int(os.getenv("AIRTABLE_FORMULA_LIMIT", "8000"))
+RESOLVE_WORKERS = int(os.getenv("AIRTABLE_RESOLVE_WORKERS", "4"))
+
+
+def record_id_formulas(record_ids, limit=None):
+    """OR(RECORD_ID()='rec...', ...) formulas for record_ids, each at most limit characters long."""
+    limit = limit or FORMULA_LIMIT
+    formulas = []
+    terms = []
+    length = len("OR()")
+    for record_id in record_ids:
+        term = str(EQ(FunctionCall("RECORD_ID"), record_id))
+        if terms and length + len(term) + 1 > limit:
+            formulas.append(f"OR({','.join(terms)})")
+            terms = []
+            length = len("OR()")
+        terms.append(term)
+        length += len(term) + 1
+    if terms:
+        formulas.append(f"OR({','.join(terms)})")
+    return formulas
+
 
 class AirTableConnection(object):
     """
-    Note: all this retry and offset looping code has to happen in the other module, where the data can be stored.
-    Leaving the notes here for now though.
-
-    Need to be able to do retries, and also to fail after them if need be.
-
-    Currently getting "[503] Service Unavailable: Backend server is at capacity".
-
-    Also possible to get "[429] Too Many Requests" if you hit it more than 5 requests per sec (per base). Must wait 30 seconds after this.
-        - Reponse sometimes includes Retry-After: 3600 (for example) to tell you how long to wait.
+    Every request to AirTable goes through a RateLimitedApi: it is paced under the limit
+    of 5 requests per second per base, and retried after a "[429] Too Many Requests" or
+    "[503] Service Unavailable" (see RateLimiter).
 
     If you try to access the AirTables metadata without having that power activated, you get:
         https://api.airtable.com/v0/meta/bases
@@ -43,7 +66,7 @@ class AirTableConnection(object):
         self.bearerToken = bearerToken
         self.airTableBaseAPI = dbaseAPI
         self.friendlyname = friendlyname
-        self.airtable = Api(self.bearerToken)
+        self.airtable = RateLimitedApi(self.bearerToken)
         self.headers = {"Authorization": "Bearer " + self.bearerToken}
 
     @classmethod
@@ -58,8 +81,9 @@ class AirTableConnection(object):
             response = records.get(model_id)
             if data_dict.get(data_key) is None:
                 data_dict[data_key] = []
-            response["table"] = table
-            data_dict[data_key].append(response)
+            if response is None:
+                continue
+            data_dict[data_key].append(dict(response, table=table))
 
     def getSingleGroupedItem(
         self,
@@ -115,22 +139,14 @@ class AirTableConnection(object):
                 high_fields = list(fieldlist.values())
                 high_table = tablename
 
-        table = self.airtable.table(self.airTableBaseAPI, high_table)
-        records = table.all(fields=high_fields)
-        high_records = []
-
-        if high_table not in cache:
-            cache[high_table] = {}
-            for r in records:
-                if r["fields"]["ID"] == idsearchterm:
-                    high_records.append(r)
-                cache[high_table][r["id"]] = r
+        high_record = self.get_record_by_id_field(high_table, idsearchterm, high_fields)
 
         # parse response here
-        if len(high_records) == 0:
+        if high_record is None:
             return None
+        high_records = [high_record]
 
-        schema = table.schema()
+        schema = self.get_table_schema(high_table)
         searchtext = high_records[0]["fields"]["ID"]
         highout = {"ID": searchtext}
         for mykey, theirkey in high_remapper.items():
@@ -155,17 +171,11 @@ class AirTableConnection(object):
                     continue
 
                 records.extend(
-                    self.get_multiple_records_by_formula(
+                    self.get_records_by_id(
                         table_id,
-                        OR(
-                            *list(
-                                map(
-                                    lambda x: EQ(x, FunctionCall("RECORD_ID")),
-                                    highout[mykey],
-                                )
-                            )
-                        ),
-                    )
+                        highout[mykey],
+                        fields=self.present_fields(table_id, ("ID", "Name")) or None,
+                    ).values()
                 )
 
                 highout[mykey] = ", ".join(
@@ -185,17 +195,38 @@ class AirTableConnection(object):
         out = SingleGroupedItem(highout)
 
         # Now get all the low items grouped under the group record.
-        low_airtable = self.airtable.table(self.airTableBaseAPI, low_table)
         if low_table == "Model_Fields":
             low_fields.append("Model_Specific_Part_of_Collection")
         elif low_table == "Collection_Fields":
             low_fields.append("Collection_Specific_Part_of_Collection")
 
-        low_records = low_airtable.all(
+        low_records = self._all(
+            low_table,
             fields=low_fields,
             formula=f'SEARCH("{searchtext}",{{{low_group_by}}})',
         )
 
+        def linked_table(mykey):
+            if mykey in prefill_data and prefill_data[mykey]["groupable"] and group_sort:
+                return group_sort["table"]
+            if mykey in prefill_data and prefill_data[mykey]["link"]:
+                return prefill_data[mykey]["link"]
+            return None
+
+        # The linked records of all the fields, fetched together per table.
+        linked_ids = {}
+        for rec in low_records:
+            if "Field" not in rec["fields"]:
+                continue
+            for mykey, theirkey in low_remapper.items():
+                table = linked_table(mykey)
+                if table is not None and theirkey in rec["fields"]:
+                    linked_ids.setdefault(table, {}).update(
+                        dict.fromkeys(rec["fields"][theirkey])
+                    )
+        for table, ids in linked_ids.items():
+            cache[table] = self.get_records_by_id(table, ids)
+
         for rec in low_records:
             if "Field" not in rec["fields"]:
                 continue
@@ -221,31 +252,8 @@ class AirTableConnection(object):
                 if theirkey not in rec["fields"]:
                     continue
 
-                if (
-                    mykey in prefill_data
-                    and prefill_data[mykey]["groupable"]
-                    and group_sort
-                ):
-                    table = group_sort["table"]
-
-                    if table not in cache:
-                        group_table = self.airtable.table(self.airTableBaseAPI, table)
-                        cache[table] = {}
-                        for r in group_table.all(fields=[]):
-                            cache[table][r["id"]] = r
-
-                    self.enrich_linked_data(
-                        remapped, mykey, rec, theirkey, table, cache[table]
-                    )
-                elif mykey in prefill_data and prefill_data[mykey]["link"]:
-                    table = prefill_data[mykey]["link"]
-
-                    if table not in cache:
-                        group_table = self.airtable.table(self.airTableBaseAPI, table)
-                        cache[table] = {}
-                        for r in group_table.all(fields=[]):
-                            cache[table][r["id"]] = r
-
+                table = linked_table(mykey)
+                if table is not None:
                     self.enrich_linked_data(
                         remapped, mykey, rec, theirkey, table, cache[table]
                     )
@@ -253,41 +261,14 @@ class AirTableConnection(object):
                     remapped[mykey] = rec["fields"][theirkey]
             out.addFields(rec["id"], remapped)
 
-        if any(
-            [prefill_data[key]["function"] == "graph_display" for key in prefill_data]
-        ):
-            # Need to parse the object's data now.
-            out.generateTurtle()
-            out.generateRDF()
-
+        # The Turtle, RDF and diagrams are generated when first used.
         return out
 
     def groupFields(self, item, field=None, group_sort=None):
-        if field is None:
-            item._GroupedFields["default"] = list(item._GroupedData.values())
-            item._GroupedFields = list(item._GroupedFields.items())
-            return
-
-        for values in item._GroupedData.values():
-            prefix = values.get(field, "default")
-            if isinstance(prefix, list) and len(prefix) > 0:
-                prefix = prefix[0].get("fields", {}).get("ID", "default")
-
-            if prefix not in item._GroupedFields:
-                item._GroupedFields[prefix] = []
-            item._GroupedFields[prefix].append(values)
-
-        item._GroupedFields = list(item._GroupedFields.items())
-        try:
-            if group_sort:
-                item._GroupedFields = sorted(
-                    item._GroupedFields,
-                    key=lambda x: x[1][0][group_sort["table"]][0]["fields"][
-                        group_sort["order"]
-                    ],
-                )
-        except Exception as ex:
-            print(ex)
+        groupOrder = None
+        if group_sort and "table" in group_sort and "order" in group_sort:
+            groupOrder = (group_sort["table"], group_sort["order"])
+        item.groupFields(field, groupOrder)
 
     def getListOfGroups(self, schema, maxrecords=None, sort=None):
         """
@@ -348,12 +329,12 @@ class AirTableConnection(object):
         if high_table is None:
             return out
 
-        table = self.airtable.table(self.airTableBaseAPI, high_table)
-
-        records = table.all(
-            fields=high_fields,
-        )
-        schema = table.schema()
+        records = self._all(high_table, fields=high_fields)
+        linked_tables = {
+            field.name: field.options.linked_table_id
+            for field in self.get_table_schema(high_table).fields
+            if getattr(getattr(field, "options", None), "linked_table_id", None)
+        }
         cache = {}
         for rec in records:
             remapped = {}
@@ -365,84 +346,181 @@ class AirTableConnection(object):
                 if isinstance(remapped[mykey], list) and any(
                     ["rec" in field for field in remapped[mykey]]
                 ):
-                    fetched_records = []
-                    table_id: Union[str, None] = None
-
-                    for field in schema.fields:
-                        if field.name == theirkey:
-                            table_id = field.options.linked_table_id
-
+                    table_id = linked_tables.get(theirkey)
                     if table_id is None:
                         print("Failed to find linked table id")
                         continue
 
                     if table_id not in cache:
-                        cache[table_id] = self.get_all_records_from_table(table_id)
-
-                    fetched_records.extend(
-                        list(
-                            filter(
-                                lambda x: x["id"] in remapped[mykey], cache[table_id]
-                            )
-                        )
-                    )
+                        cache[table_id] = self.get_linked_names(table_id)
 
                     remapped[mykey] = ", ".join(
-                        list(
-                            filter(
-                                lambda x: x,
-                                map(
-                                    lambda x: x.get("fields", {}).get(
-                                        "ID", x.get("fields", {}).get("Name")
-                                    ),
-                                    fetched_records,
-                                ),
-                            )
-                        )
+                        name
+                        for name in map(cache[table_id].get, remapped[mykey])
+                        if name
                     )
 
             out.append(remapped)
 
         return out
 
+    def _cached(self, table, kind, load, fields=None, formula=None):
+        # every read from AirTable goes through the process-wide RecordCache
+        return RecordCache.cached(
+            RecordCache.key(self.airTableBaseAPI, table, kind, fields, formula), load
+        )
+
+    def _all(self, table_name, fields=None, formula=None):
+        options = {}
+        if fields:
+            options["fields"] = list(fields)
+        if formula is not None:
+            options["formula"] = formula
+        table = self.airtable.table(self.airTableBaseAPI, table_name)
+        return self._cached(
+            table_name, "all", lambda: table.all(**options), fields, formula
+        )
+
+    def _first(self, table_name, fields=None, formula=None):
+        options = {}
+        if fields:
+            options["fields"] = list(fields)
+        if formula is not None:
+            options["formula"] = formula
+        table = self.airtable.table(self.airTableBaseAPI, table_name)
+        return self._cached(
+            table_name, "first", lambda: table.first(**options), fields, formula
+        )
+
+    def get_table_schema(self, table_name):
+        table = self.airtable.table(self.airTableBaseAPI, table_name)
+        return self._cached(table_name, "schema", table.schema)
+
     def getsinglerecord(self, tablename, fieldlist):
         """
         A single call to the AirTable, returning the unprocessed JSON result from AirTable.
         """
-        fields = fieldlist.values()
-
-        table = self.airtable.table(self.airTableBaseAPI, tablename)
-        record = table.first(fields=fields)
-
-        return record
+        return self._first(tablename, fields=list(fieldlist.values()))
 
     def get_record_by_formula(self, table_name: str, formula: Compound):
         """
         A single call to the AirTable, returning the unprocessed JSON result from AirTable.
         """
-        table: Table = self.airtable.table(self.airTableBaseAPI, table_name)
-        return table.first(formula=formula)
+        return self._first(table_name, formula=formula)
 
     def get_multiple_records_by_formula(self, table, formula):
         """
         A single call to the AirTable, returning the unprocessed JSON result from AirTable.
         """
-        table = self.airtable.table(self.airTableBaseAPI, table)
-        return table.all(formula=formula)
+        return self._all(table, formula=formula)
+
+    def get_record_by_id_field(self, table_name, value, fields=None):
+        """
+        The record of the table whose "ID" field is value, or None, in one request: by its
+        record id when value is one, or is in the table's RecordIndex, else by a formula.
+        """
+        table: Table = self.airtable.table(self.airTableBaseAPI, table_name)
+        candidates = [value] if isRecordId(value) else []
+        found = RecordIndex.index(
+            self.airTableBaseAPI, table_name, lambda: table.all(fields=["ID"])
+        ).lookup(value)
+        if found:
+            candidates.append(found)
+
+        for record_id in candidates:
+            try:
+                record = self.get_record_by_id(table_name, record_id)
+            except HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                continue
+            if record_id == value or record["fields"].get("ID") == value:
+                return record
+
+        return self._first(table_name, fields=fields, formula=EQ(Field("ID"), value))
+
+    def get_records_by_id(self, table, record_ids, fields=None):
+        """
+        {record id: record} for the record_ids of table, with only fields if given.
+        Ids found in the RecordCache are not fetched again; the others are fetched by
+        formula, in as few requests as the formula length allows, RESOLVE_WORKERS at a
+        time. Ids with no record are left out.
+        """
+        base = self.airTableBaseAPI
+        known = {}
+        wanted = []
+        for x in dict.fromkeys(record_ids):
+            if not isinstance(x, str):
+                continue
+            record = RecordCache.get(RecordCache.key(base, table, "get", fields, x))
+            if record is None and fields:
+                record = RecordCache.get(RecordCache.key(base, table, "get", None, x))
+            if record is None:
+                wanted.append(x)
+            else:
+                known[x] = record
+
+        if wanted:
+            options = {"fields": list(fields)} if fields else {}
+            airtable = self.airtable.table(base, table)
+            formulas = record_id_formulas(wanted)
+            if len(formulas) == 1 or RESOLVE_WORKERS <= 1:
+                pages = [airtable.all(formula=f, **options) for f in formulas]
+            else:
+                with ThreadPoolExecutor(max_workers=RESOLVE_WORKERS) as pool:
+                    pages = list(
+                        pool.map(lambda f: airtable.all(formula=f, **options), formulas)
+                    )
+            for page in pages:
+                for record in page:
+                    known[record["id"]] = record
+                    RecordCache.put(
+                        RecordCache.key(base, table, "get", fields, record["id"]), record
+                    )
+
+        return {x: known[x] for x in record_ids if x in known}
+
+    def present_fields(self, table, fields):
+        """The names in fields that table has; asking AirTable for any other is a 422."""
+        present = {field.name for field in self.get_table_schema(table).fields}
+        return [f for f in fields if f in present]
+
+    def get_linked_names(self, table):
+        """
+        {record id: ID (else Name)} of every record of table, from one listing of only
+        those two fields; for showing linked records by name.
+        """
+        fields = self.present_fields(table, ("ID", "Name"))
+        if not fields:
+            return {}
+        names = {}
+        for record in self._all(table, fields=fields):
+            name = record.get("fields", {}).get("ID", record.get("fields", {}).get("Name"))
+            if name:
+                names[record["id"]] = str(name)
+        return names
 
     def get_all_records_from_table(self, table):
         """
         A single call to the AirTable, returning the unprocessed JSON result from AirTable.
         """
-        table = self.airtable.table(self.airTableBaseAPI, table)
-        return table.all()
+        return self._all(table)
 
     def get_record_by_id(self, table, record_id):
         """
         A single call to the AirTable, returning the unprocessed JSON result from AirTable.
         """
-        table = self.airtable.table(self.airTableBaseAPI, table)
-        return table.get(record_id)
+        airtable = self.airtable.table(self.airTableBaseAPI, table)
+        return self._cached(
+            table, "get", lambda: airtable.get(record_id), formula=record_id
+        )
+
+    def update_record(self, table_name, record_id, fields, base=None):
+        """Writes fields to a record of table_name, in base (default: this one), and drops the table's cached reads."""
+        base = base or self.airTableBaseAPI
+        record = self.airtable.table(base, table_name).update(record_id, fields)
+        RecordCache.invalidate(base, table_name)
+        return record
 
     def _fixarrows(self, txt):
         """Convert text arrows to Unicode arrows"""
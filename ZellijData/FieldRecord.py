@@ -0,0 +1,66 @@
+"""
+One field of a SingleGroupedItem: the data of one record of the underlying data table.
+
+A FieldRecord is the dict of the record's values as they came from the source, so
+code that indexes linked records (values["Field"][0], ...) keeps working, and it
+renders like a dict in the templates. Its plain() view, with AirTable's one-entry
+lists unwrapped for display, is built once when the record is made, and shares every
+value that needs no unwrapping.
+"""
+
+
+def stripbraces(val):
+    """
+    When an AirTable field is a referenced field, it appears as a one-entry list, which if left as-is
+    will display in the Jinja template as "['actual text']" with the Python list representation.
+    Returns val with those lists replaced by their entry, in dictionaries too, without changing val:
+    containers are only copied when something in them changes.
+    """
+    if isinstance(val, list) and len(val) == 1:
+        val = val[0]
+    if isinstance(val, dict):
+        out = None
+        for k, v in val.items():
+            s = stripbraces(v)
+            if s is not v:
+                if out is None:
+                    out = dict(val)
+                out[k] = s
+        if out is not None:
+            return out
+    return val
+
+
+class FieldRecord(dict):
+    """The values of one field, keyed by their remapped names, plus its record key."""
+
+    __slots__ = ("key", "_plain")
+
+    def __init__(self, key, data, exclude=("GroupBy",)):
+        super().__init__((k, v) for k, v in data.items() if k not in exclude)
+        self.key = key
+        self._normalize()
+
+    def _normalize(self):
+        plain = stripbraces(dict(self))
+        # None when no value is a one-entry list: the record is its own plain view
+        self._plain = None if all(plain[k] is v for k, v in self.items()) else plain
+
+    def plain(self):
+        """The values for display, with one-entry lists unwrapped."""
+        return self if self._plain is None else self._plain
+
+    def __setitem__(self, k, v):
+        super().__setitem__(k, v)
+        self._normalize()
+
+    def __delitem__(self, k):
+        super().__delitem__(k)
+        self._normalize()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._normalize()
+
+    def __reduce__(self):
+        return (self.__class__, (self.key, dict(self), ()))
@@ -0,0 +1,184 @@
+"""
+A column-wise view of the fields of a SingleGroupedItem, for sorting, grouping and
+filtering a model's fields without walking every record for every question.
+
+Each column (the values of one field label, in row order) is built the first time it is
+asked for, as are its typed sort keys and its indexes. Every view is kept per
+(group-by, sort-by, group order), so a page or export asking for the same view twice
+gets the same list back.
+
+The table is built from the fields as they are when it is made; SingleGroupedItem
+makes a new one when fields are added.
+"""
+
+from ZellijData.FieldRecord import stripbraces
+
+DEFAULT = "default"
+
+
+def isNumber(v):
+    return (isinstance(v, int) and not isinstance(v, bool)) or (
+        isinstance(v, str) and v.isdigit()
+    )
+
+
+def typedKeys(values):
+    """
+    Sort keys for values: numbers when every value is an int or a string of digits,
+    else case-insensitive text as the templates sort; empty values sort last.
+    """
+    present = [v for v in values if v not in (None, "", [])]
+    if present and all(isNumber(v) for v in present):
+        return [(1, 0) if v in (None, "", []) else (0, int(v)) for v in values]
+    out = []
+    for v in values:
+        if v in (None, "", []):
+            out.append((1, ""))
+        else:
+            v = stripbraces(v)
+            out.append((0, v.lower() if isinstance(v, str) else str(v).lower()))
+    return out
+
+
+def prefixOf(value):
+    """The group of a field value: the ID of a linked record, the first of a list, or itself."""
+    if value is None:
+        return DEFAULT
+    if isinstance(value, list):
+        if len(value) == 0:
+            return DEFAULT
+        value = value[0]
+        if isinstance(value, dict):
+            value = stripbraces(value.get("fields", {}).get("ID", DEFAULT))
+    try:
+        hash(value)
+    except TypeError:
+        value = str(value)
+    return value
+
+
+class FieldTable(object):
+    """
+    The fields (FieldRecords) of one item as columns, one list per field label.
+    Row i of every column is rows[i].
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self._columns = {}
+        self._keys = {}
+        self._numeric = {}
+        self._orders = {}
+        self._groups = {}
+        self._indexes = {}
+        self._views = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def labels(self):
+        """Every field label, in the order they first appear."""
+        return list(dict.fromkeys(k for r in self.rows for k in r))
+
+    def column(self, label):
+        if label not in self._columns:
+            self._columns[label] = [r.get(label) for r in self.rows]
+        return self._columns[label]
+
+    def sortKeys(self, label):
+        if label not in self._keys:
+            self._keys[label] = typedKeys(self.column(label))
+        return self._keys[label]
+
+    def numeric(self, label):
+        """True when every row has an int or a string of digits for label."""
+        if label not in self._numeric:
+            self._numeric[label] = bool(self.rows) and all(
+                isNumber(v) for v in self.column(label)
+            )
+        return self._numeric[label]
+
+    def coerceNumeric(self, label):
+        """Stores the values of a numeric column as ints in the records, once."""
+        if not self.numeric(label):
+            return False
+        column = self.column(label)
+        for i, (row, v) in enumerate(zip(self.rows, column)):
+            if not isinstance(v, int):
+                column[i] = int(v)
+                row[label] = column[i]
+        return True
+
+    def order(self, label, reverse=False):
+        """Row numbers in order of label's sort keys; ties keep row order."""
+        k = (label, reverse)
+        if k not in self._orders:
+            keys = self.sortKeys(label)
+            self._orders[k] = sorted(
+                range(len(self.rows)), key=keys.__getitem__, reverse=reverse
+            )
+        return self._orders[k]
+
+    def groups(self, label):
+        """Group -> row numbers, grouped by prefixOf(label's value), in order of appearance."""
+        if label not in self._groups:
+            groups = {}
+            for i, v in enumerate(self.column(label)):
+                groups.setdefault(prefixOf(v), []).append(i)
+            self._groups[label] = groups
+        return self._groups[label]
+
+    def index(self, label):
+        """
+        Value -> row numbers, for the hashable values of label's column; a list is
+        indexed by its first entry, as linked record IDs are read.
+        """
+        if label not in self._indexes:
+            index = {}
+            for i, v in enumerate(self.column(label)):
+                if isinstance(v, list) and v:
+                    v = v[0]
+                try:
+                    index.setdefault(v, []).append(i)
+                except TypeError:
+                    pass
+            self._indexes[label] = index
+        return self._indexes[label]
+
+    def select(self, label, value):
+        """The records whose label is value, or a list starting with it."""
+        return [self.rows[i] for i in self.index(label).get(value, [])]
+
+    def view(self, groupBy=None, sortBy=None, groupOrder=None):
+        """
+        [(group, [records])]: the rows grouped by groupBy (all in "default" without
+        it), each group sorted by sortBy, and the groups ordered by groupOrder, a
+        (label, field) pair naming a field of the record linked from the group's
+        first row; groups in order of appearance without it.
+        """
+        k = (groupBy, sortBy, groupOrder)
+        if k not in self._views:
+            if groupBy is None:
+                groups = {DEFAULT: list(range(len(self.rows)))}
+            else:
+                groups = self.groups(groupBy)
+            if sortBy is not None:
+                rank = {row: n for n, row in enumerate(self.order(sortBy))}
+                groups = {g: sorted(rows, key=rank.__getitem__) for g, rows in groups.items()}
+            names = list(groups)
+            if groupOrder is not None:
+                names = self._orderGroups(names, groups, *groupOrder)
+            self._views[k] = [(g, [self.rows[i] for i in groups[g]]) for g in names]
+        return self._views[k]
+
+    def _orderGroups(self, names, groups, label, field):
+        column = self.column(label)
+        values = []
+        for g in names:
+            linked = column[groups[g][0]]
+            if isinstance(linked, list) and linked and isinstance(linked[0], dict):
+                values.append(linked[0].get("fields", {}).get(field))
+            else:
+                values.append(None)
+        keys = typedKeys(values)
+        return [g for _, g in sorted(zip(keys, names), key=lambda x: x[0])]
@@ -0,0 +1,188 @@
+"""
+Parsed triples of each field's Turtle fragment, so a group or model graph is built
+by set union instead of parsing the concatenated Turtle of its fields.
+
+A fragment is parsed under the prefix block of the Turtle it is part of, and is
+stored under a hash of both: the same field shown in several groups, models or
+requests with the same prefixes is parsed once. ZELLIJ_FRAGMENT_CACHE_SIZE entries
+(default 4096) are kept, least recently used first out.
+
+The triples of the last ZELLIJ_GRAPH_CACHE_SIZE composed graphs (default 64) are kept
+too; each caller gets a graph of its own built from them.
+
+Fragments are only parsed apart when that means the same as parsing them together: when
+one uses blank node labels (_:b), which are shared across the fields of one document,
+repeats a fragment with anonymous nodes ([ ] or lists), which are distinct nodes in each
+copy, or cannot be parsed alone (e.g. a statement split across fields), their joined
+text is parsed once instead, as a whole.
+
+A parse error is raised as the rdflib BadSyntax of the joined text, with the field the
+error is in in its "field" attribute.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from rdflib.plugins.parsers.notation3 import BadSyntax
+
+from ZellijData.RDFCodeBlock import RDFGraph
+
+MEMORY_SIZE = int(os.getenv("ZELLIJ_FRAGMENT_CACHE_SIZE", "4096"))
+GRAPH_SIZE = int(os.getenv("ZELLIJ_GRAPH_CACHE_SIZE", "64"))
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_graphs = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "graphHits": 0}
+
+
+class Fragment(object):
+    """The triples (in parse order), prefix bindings and invalid URIs of one parsed fragment."""
+
+    __slots__ = ("triples", "namespaces", "invalid_uris")
+
+    def __init__(self, triples, namespaces, invalid_uris):
+        self.triples = triples
+        self.namespaces = namespaces
+        self.invalid_uris = invalid_uris
+
+
+def key(prefix, text):
+    h = hashlib.sha256(prefix.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _remember(cache, size, k, value):
+    if size <= 0:
+        return
+    with _lock:
+        cache[k] = value
+        cache.move_to_end(k)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def parse(prefix, text, k=None):
+    """The Fragment for Turtle "text" under the @prefix lines "prefix"; may raise BadSyntax."""
+    k = k or key(prefix, text)
+    with _lock:
+        fragment = _memory.get(k)
+        if fragment is not None:
+            _memory.move_to_end(k)
+            _stats["hits"] += 1
+            return fragment
+        _stats["misses"] += 1
+
+    g = RDFGraph()
+    g.parse(data=prefix + "\n\n" + text, format="turtle")
+    fragment = Fragment(tuple(g), tuple(g.namespaces()), tuple(g.invalid_uris))
+    _remember(_memory, MEMORY_SIZE, k, fragment)
+    return fragment
+
+
+def _fieldAt(prefix, fragments, line):
+    # The name of the fragment holding line (0-based) of the joined text, or None
+    start = prefix.count("\n") + 2
+    field = None
+    for name, text in fragments:
+        if line < start:
+            break
+        field = name
+        start += text.count("\n") + 1
+    return field
+
+
+def _joined(prefix, fragments):
+    # The baseline's single parse of the joined Turtle of every fragment
+    try:
+        return parse(prefix, "\n".join(text for _, text in fragments))
+    except BadSyntax as bs:
+        bs.field = _fieldAt(prefix, fragments, bs.lines)
+        raise
+
+
+def _union(parsed):
+    namespaces = parsed[0].namespaces
+    # the union, in the order the triples were parsed
+    triples = tuple(dict.fromkeys(t for f in parsed for t in f.triples))
+    invalid = tuple(dict.fromkeys(u for f in parsed for u in f.invalid_uris))
+    return Fragment(triples, namespaces, invalid)
+
+
+def _apart(fragments, keys):
+    """Whether parsing fragments apart means the same as parsing their joined text."""
+    seen = set()
+    for (_, text), k in zip(fragments, keys):
+        if "_:" in text:
+            # blank node labels are shared by the fields of one document
+            return False
+        if k in seen and ("[" in text or "(" in text):
+            # the same anonymous nodes and lists, twice, are distinct nodes once joined
+            return False
+        seen.add(k)
+    return True
+
+
+def _build(prefix, fragments, keys):
+    if not _apart(fragments, keys[1:]):
+        return _joined(prefix, fragments)
+    parsed = [parse(prefix, "", keys[0])]
+    for (name, text), k in zip(fragments, keys[1:]):
+        try:
+            parsed.append(parse(prefix, text, k))
+        except BadSyntax:
+            # may be part of a statement that goes on in the next field
+            return _joined(prefix, fragments)
+    return _union(parsed)
+
+
+def compose(prefixes, fragments, readonly=True):
+    """
+    A new RDFGraph holding the triples of fragments, a list of (field name, Turtle
+    text without @prefix lines), under the @prefix lines "prefixes": the union of each
+    fragment's triples, or, when a fragment uses blank node labels or cannot be parsed
+    on its own, the triples of their joined text.
+    """
+    prefix = "\n".join(prefixes)
+    keys = [key(prefix, "")] + [key(prefix, text) for _, text in fragments]
+    graphKey = hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
+    with _lock:
+        composed = _graphs.get(graphKey)
+        if composed is not None:
+            _graphs.move_to_end(graphKey)
+            _stats["graphHits"] += 1
+    if composed is None:
+        composed = _build(prefix, fragments, keys)
+        _remember(_graphs, GRAPH_SIZE, graphKey, composed)
+
+    # each caller gets its own graph: serializing one rebinds its namespaces
+    graph = RDFGraph()
+    for p, ns in composed.namespaces:
+        graph.bind(p, ns)
+    graph.addN((s, p, o, graph) for s, p, o in composed.triples)
+    graph.invalid_uris.update(dict.fromkeys(composed.invalid_uris))
+    graph.readonly = readonly
+    if readonly:
+        # what the graph was parsed from: CRITERIA's diagram cache keys on it
+        graph.contentKey = graphKey
+    return graph
+
+
+def stats():
+    with _lock:
+        out = dict(_stats)
+        out["size"] = len(_memory)
+        out["graphs"] = len(_graphs)
+    return out
+
+
+def clear():
+    with _lock:
+        _memory.clear()
+        _graphs.clear()
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,111 @@
+"""
+The graph work of the field groups of a model (parsing, JSON-LD and both diagrams) in
+a pool of worker processes, so that a model with many groups takes about as long as
+its largest groups rather than the sum of all of them.
+
+Off unless ZELLIJ_GRAPH_WORKERS is set to a number of processes, or to "auto" for one
+per CPU; with 1 (or "auto" on one CPU) the groups are built in-process, as without it,
+since a single worker would only add the cost of sending the jobs. The pool is started on first use and kept for the life of the process; each
+worker loads the CRITERIA class index and the JSON-LD context once, when it starts.
+
+A job is the Turtle of one group, as @prefix lines and (field name, Turtle) fragments,
+so that only text crosses to the workers; see SingleGroupedItem.generateGroupGraphs().
+"""
+
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+def workers():
+    """The number of worker processes asked for with ZELLIJ_GRAPH_WORKERS, 0 when off."""
+    value = (os.getenv("ZELLIJ_GRAPH_WORKERS") or "0").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return 0
+
+
+def enabled():
+    """True with more than one worker; 1 means in-process."""
+    return workers() > 1
+
+
+class GroupGraphs(object):
+    """The outputs of one group's job, or the error that stopped it."""
+
+    __slots__ = ("jsonld", "ontology", "instance", "error")
+
+    def __init__(self, jsonld=None, ontology=None, instance=None, error=None):
+        self.jsonld = jsonld
+        self.ontology = ontology
+        self.instance = instance
+        self.error = error
+
+
+def _initWorker():
+    from CRITERIA import criteria
+    from ZellijData import JsonLDContext
+
+    logging.disable(logging.INFO)
+    criteria.warm()
+    JsonLDContext.registry.context(JsonLDContext.LINKED_ART)
+
+
+def groupJob(prefixes, fragments, budget):
+    """Runs in a worker: the GroupGraphs of the fragments of one group."""
+    from CRITERIA import criteria
+    from ZellijData import FragmentCache
+    from ZellijData.RDFCodeBlock import RDFCodeBlock
+
+    try:
+        graph = FragmentCache.compose(prefixes, fragments)
+        return GroupGraphs(
+            jsonld=RDFCodeBlock.fromGraph(graph, readonly=True).jsonld(),
+            ontology=criteria.ontology(graph, budget=budget),
+            instance=criteria.instance(graph, budget=budget),
+        )
+    except Exception as e:
+        # the caller builds this group itself, to report the error as it always has
+        return GroupGraphs(error=f"{type(e).__name__}: {e}")
+
+
+_lock = threading.Lock()
+_pool = None
+
+
+def pool():
+    """The process pool, started on first use."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers(), initializer=_initWorker)
+            atexit.register(shutdown)
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def run(jobs, budget=None):
+    """
+    The GroupGraphs of each job, a (prefixes, fragments) pair, in order: in the pool
+    when it is enabled and there is more than one job, else one after the other here.
+    """
+    jobs = list(jobs)
+    if not enabled() or len(jobs) <= 1:
+        return [groupJob(prefixes, fragments, budget) for prefixes, fragments in jobs]
+    futures = [
+        pool().submit(groupJob, tuple(prefixes), list(fragments), budget)
+        for prefixes, fragments in jobs
+    ]
+    return [f.result() for f in futures]
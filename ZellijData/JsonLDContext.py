@@ -0,0 +1,112 @@
+"""
+JSON-LD contexts for serializing our graphs, without a network round trip.
+
+The Linked Art context is bundled (Getty-linked-art.json) and stands in for its URL.
+Any other context URL is fetched once and kept on disk (JSONLD_CONTEXT_CACHE_DIR).
+Each context is processed once per process, then reused by every serialization.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from rdflib.plugins.serializers.jsonld import Converter
+from rdflib.plugins.shared.jsonld.context import Context
+from rdflib.plugins.shared.jsonld.keys import CONTEXT, GRAPH
+from rdflib.plugins.shared.jsonld.util import source_to_json
+
+LINKED_ART = "https://linked.art/ns/v1/linked-art.json"
+
+# context URL -> bundled copy
+BUNDLED = {
+    LINKED_ART: os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "Getty-linked-art.json"
+    ),
+}
+
+CACHE_DIR = os.getenv("JSONLD_CONTEXT_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "zellij-jsonld-contexts"
+)
+
+
+class ContextRegistry(object):
+    """
+    Context URL -> processed rdflib Context, looked up in memory, then in the bundled
+    files, then in the disk cache, and only then on the network.
+    """
+
+    def __init__(self, bundled=None, directory=None):
+        self.bundled = BUNDLED if bundled is None else bundled
+        self.directory = directory or CACHE_DIR
+        self._contexts = {}
+        self._lock = threading.Lock()
+
+    def path(self, url):
+        return os.path.join(
+            self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+        )
+
+    def document(self, url):
+        """The JSON document of a context URL."""
+        if url in self.bundled:
+            with open(self.bundled[url], encoding="utf-8") as f:
+                return json.load(f)
+        path = self.path(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        document = source_to_json(url)
+        self._write(path, document)
+        return document
+
+    def _write(self, path, document):
+        # A cache that cannot be written only costs another fetch.
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(document, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def context(self, url):
+        """The processed Context of a context URL, built on first use."""
+        context = self._contexts.get(url)
+        if context is None:
+            with self._lock:
+                context = self._contexts.get(url)
+                if context is None:
+                    context = Context(self.document(url))
+                    self._contexts[url] = context
+        return context
+
+    def serialize(self, graph, url, indent=2):
+        """
+        JSON-LD for graph, compacted with the context at url, which is referenced by URL
+        in the output, as graph.serialize(format="json-ld", context=url) does.
+        """
+        context = self.context(url)
+        result = Converter(context, False, False).convert(graph)
+        if context.active:
+            if isinstance(result, list):
+                result = {context.get_key(GRAPH): result}
+            result[CONTEXT] = url
+        return json.dumps(
+            result,
+            indent=indent,
+            separators=(",", ": "),
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+
+
+registry = ContextRegistry()
+
+
+def serialize(graph, url=LINKED_ART):
+    return registry.serialize(graph, url)
@@ -151,12 +151,7 @@ class NocoConnection(object):
                             if theirkey in rec:
                                 remapped[mykey] = rec[theirkey]
                         out.addFields(rec["ID"], remapped)
-        # Need to parse the object's data now.
-
-        out.generateTurtle()
-        out.generateRDF()
-        out.generateOntologyGraph()
-        out.generateInstanceGraph()
+        # The Turtle, RDF and diagrams are generated when first used.
         return out
 
     def getListOfGroups(self, schema, maxrecords=None, sort=None):
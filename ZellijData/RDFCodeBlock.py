@@ -13,9 +13,74 @@ from io import StringIO
 import html
 from rdflib import Graph
 from rdflib.term import URIRef
+
+from ZellijData import JsonLDContext
+from ZellijData.TurtleCodeBlock import BODY, PREFIX, tokenize
 # from rdflib_jsonld.context import Context
 # from rdflib.plugins.parsers.notation3 import BadSyntax
 
+# Characters that make an IRI unserializable
+_INVALID_URI = re.compile(r'[<>" {}|\\^`]')
+
+
+class RDFGraph(Graph):
+    """
+    An rdflib Graph that counts its changes (revision), so what is computed from it can be
+    kept until the next change. A read-only graph refuses to change once it is frozen.
+
+    While parsing, each distinct URI is checked as its triples are added; the invalid
+    ones are collected, in the order met, in invalid_uris.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.revision = 0
+        self.readonly = False
+        self.invalid_uris = {}  # used as an ordered set
+        self._seen = None
+        super().__init__(*args, **kwargs)
+
+    def parse(self, *args, **kwargs):
+        self._seen = set()
+        try:
+            return super().parse(*args, **kwargs)
+        finally:
+            self._seen = None
+
+    def _check(self, terms):
+        seen = self._seen
+        for term in terms:
+            if isinstance(term, URIRef) and term not in seen:
+                seen.add(term)
+                if _INVALID_URI.search(term):
+                    self.invalid_uris[str(term)] = None
+
+    def _changed(self):
+        if self.readonly:
+            raise TypeError("This RDF graph is read-only.")
+        self.revision += 1
+
+    def add(self, triple):
+        self._changed()
+        if self._seen is not None:
+            self._check(triple)
+        return super().add(triple)
+
+    def addN(self, quads):
+        self._changed()
+        if self._seen is not None:
+            quads = list(quads)
+            for quad in quads:
+                self._check(quad[:3])
+        return super().addN(quads)
+
+    def remove(self, triple):
+        self._changed()
+        return super().remove(triple)
+
+    def bind(self, *args, **kwargs):
+        self._changed()
+        return super().bind(*args, **kwargs)
+
 
 class RDFCodeBlock(object):
     """
@@ -26,58 +91,87 @@ class RDFCodeBlock(object):
     Along with the possibility to output other code formats,
     specifically JSON-LD.
     https://json-ld.org/
+
+    Serializations are kept per (format, context) until the graph changes.
+    With readonly=True the source text is dropped once parsed and the graph
+    can no longer be changed.
     """
 
     DEFAULT_STYLE = "turtle"
 
-    def __init__(self, *args, style=DEFAULT_STYLE):
+    def __init__(self, *args, style=DEFAULT_STYLE, readonly=False):
         """
         Constructor
         """
         self.originaltext = None
         self.style = style
         self.graph = None
-        self.originaltext = "\n".join(args)
+        self.readonly = readonly
+        self._serialized = {}
+        self._serializedFor = None
         self.warnings = None
         self.errors = None
         if len(args) > 0:
-            self.parse(self.originaltext, self.style)
+            self.parse("\n".join(args), self.style)
             # except BadSyntax as e:
-        """
-        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Getty-linked-art.json"), "r") as f:
-            self.jsoncontext = json.load(f)
-        """
-        self.jsoncontext = "https://linked.art/ns/v1/linked-art.json"
+        # resolved from the bundled Getty-linked-art.json, see JsonLDContext
+        self.jsoncontext = JsonLDContext.LINKED_ART
+
+    @classmethod
+    def fromGraph(cls, graph, style=DEFAULT_STYLE, readonly=False):
+        """A code block for an already built graph (e.g. by FragmentCache.compose), with no source text."""
+        block = cls(style=style, readonly=readonly)
+        block.graph = graph
+        if readonly and isinstance(graph, RDFGraph):
+            graph.readonly = True
+        block._validate_uri()
+        return block
 
     def parse(self, text, style=DEFAULT_STYLE):
         reader = StringIO(text)
-        self.graph = Graph()
+        self.graph = RDFGraph()
         self.graph.parse(reader, format=style)
+        self.graph.readonly = self.readonly
+        self.originaltext = None if self.readonly else text
         self._validate_uri()
 
     def _validate_uri(self):
-        _invalid_uri_chars = '<>" {}|\\^`'
-        err = []
-        for g in self.graph:
-            for ref in g:
-                if isinstance(ref, URIRef):
-                    for c in _invalid_uri_chars:
-                        if c in str(ref):
-                            if not str(ref) in err:
-                                err.append(str(ref))
-                            break
+        if isinstance(self.graph, RDFGraph):
+            # checked while parsing
+            err = list(self.graph.invalid_uris)
+        else:
+            seen = set()
+            err = []
+            for triple in self.graph:
+                for ref in triple:
+                    if isinstance(ref, URIRef) and ref not in seen:
+                        seen.add(ref)
+                        if _INVALID_URI.search(ref):
+                            err.append(str(ref))
         if err:
             self.warnings = err
 
     def print(self, style=DEFAULT_STYLE, context=None):
+        if not context:
+            context = self.jsoncontext
+        state = (id(self.graph), getattr(self.graph, "revision", None))
+        if state[1] is None or state != self._serializedFor:
+            # a new or changed graph; a plain rdflib Graph cannot tell, so is never kept
+            self._serialized = {}
+            self._serializedFor = state
+        key = (style, context if isinstance(context, str) else json.dumps(context, sort_keys=True))
+        if key in self._serialized:
+            return self._serialized[key]
         try:
-            if not context:
-                context = self.jsoncontext
-            out = self.graph.serialize(format=style, context=context)
-            out = out  # .decode("utf-8")
-            return out
+            if style == "json-ld" and isinstance(context, str):
+                out = JsonLDContext.serialize(self.graph, context)
+            else:
+                out = self.graph.serialize(format=style, context=context)
         except Exception as e:
             return str(e)
+        if state[1] is not None:
+            self._serialized[key] = out
+        return out
 
     def html(self, style=DEFAULT_STYLE):
         return html.escape(self.print(style=style))
@@ -98,32 +192,17 @@ class RDFCodeBlock(object):
             self.warnings = []
 
         prefix = []
+        seen = set()
         body = []
-        for i, ln in enumerate(text.splitlines(), start=1):
-            m = re.match(r"^\s*(\@prefix .*?\s+\<[^>]*\>\s+\.)\s*?(.*)", ln)
-            if m:
-                if m.group(1) and not m.group(1) in prefix:
-                    t = m.group(1).rstrip()
-                    if t != m.group(1):
-                        self.warnings.append(
-                            {"line": i, "text": "Trailing whitespace."}
-                        )
+        for i, kind, t in tokenize(text, fillEmptyURI=False):
+            if kind is BODY:
+                body.append(t)
+            elif kind is PREFIX:
+                if t not in seen:
+                    seen.add(t)
                     prefix.append(t)
-                if m.group(2):
-                    self.warnings.append(
-                        {"line": i, "text": "Missing newline between prefix and body."}
-                    )
-                    t = m.group(2).rstrip()
-                    if t != m.group(2):
-                        self.warnings.append(
-                            {"line": i, "text": "Trailing whitespace."}
-                        )
-                    body.append(t)
             else:
-                t = ln.rstrip()
-                if t != ln:
-                    self.warnings.append({"line": i, "text": "Trailing whitespace."})
-                body.append(t)
+                self.warnings.append({"line": i, "text": t})
         txt = ""
         txt += "\n".join(prefix)
         if prefix:
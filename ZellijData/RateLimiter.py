@@ -0,0 +1,213 @@
+"""
+Paces requests to AirTable under its limit of 5 requests per second per base, and
+retries the ones it turns down.
+
+Each base has a token bucket (AIRTABLE_RATE requests per second, default 5, in bursts of
+up to AIRTABLE_BURST, default 5). The bucket is kept as the GCRA "theoretical arrival
+time" in a small file per base in AIRTABLE_RATE_DIR, under an exclusive lock, so all the
+threads and processes of a server share it. A caller reserves the next free slot and
+sleeps until then, so bulk work runs at the sustained rate instead of bursting into a
+429 and its 30 second penalty.
+
+A 429 or 503 response is retried up to AIRTABLE_RETRIES times (default 5), after the
+Retry-After it gives, else after a jittered exponential backoff (30 seconds for a 429,
+AirTable's penalty). A 429 also holds back every other caller of the base for that long.
+A wait longer than AIRTABLE_MAX_WAIT seconds (default 120) is not attempted: the error
+is raised.
+
+metrics() returns the counts of requests, queued (delayed by the bucket), throttled
+(429/503 responses), retried and failed calls of this process, per base.
+"""
+
+import logging
+import os
+import random
+import re
+import struct
+import tempfile
+import threading
+import time
+
+import requests
+from pyairtable import Api
+
+try:
+    import fcntl
+except ImportError:  # Windows: the bucket is then only shared by threads
+    fcntl = None
+
+RATE = float(os.getenv("AIRTABLE_RATE", "5"))
+BURST = int(os.getenv("AIRTABLE_BURST", "5"))
+RETRIES = int(os.getenv("AIRTABLE_RETRIES", "5"))
+MAX_WAIT = float(os.getenv("AIRTABLE_MAX_WAIT", "120"))
+PENALTY = 30.0
+BACKOFF = 0.5
+RETRY_STATUS = (429, 503)
+DIRECTORY = os.getenv("AIRTABLE_RATE_DIR") or os.path.join(
+    tempfile.gettempdir(), "zellij-airtable-rate"
+)
+
+_BASE = re.compile(r"/v0/(?:meta/bases/)?(app[A-Za-z0-9]+)")
+
+_lock = threading.Lock()
+_locks = {}
+_metrics = {}
+_COUNTERS = ("requests", "queued", "queuedSeconds", "throttled", "retried", "failed")
+
+
+def baseOf(url):
+    """The base id a request URL is for, or "" for requests outside any base."""
+    m = _BASE.search(url)
+    return m.group(1) if m else ""
+
+
+def _count(base, counter, n=1):
+    with _lock:
+        m = _metrics.setdefault(base, dict.fromkeys(_COUNTERS, 0))
+        m[counter] += n
+
+
+def metrics():
+    with _lock:
+        return {base: dict(m) for base, m in _metrics.items()}
+
+
+def resetMetrics():
+    with _lock:
+        _metrics.clear()
+
+
+class TokenBucket(object):
+    """
+    The bucket of one base, kept in a file shared by every process (see the module
+    docstring); the in-process lock orders the threads, the file lock the processes.
+    """
+
+    def __init__(self, base, rate=None, burst=None, directory=None):
+        self.base = base
+        self.rate = rate or RATE
+        self.burst = max(burst or BURST, 1)
+        self.path = os.path.join(directory or DIRECTORY, f"{base or 'airtable'}.tat")
+        with _lock:
+            self._lock = _locks.setdefault(self.path, threading.Lock())
+
+    def _update(self, change):
+        # Calls change(tat, now) -> new tat under both locks; returns (old tat, now).
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            except OSError:
+                fd = None
+            try:
+                if fd is not None and fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                tat = getattr(self, "_tat", 0.0)
+                if fd is not None:
+                    data = os.pread(fd, 8, 0)
+                    if len(data) == 8:
+                        tat = struct.unpack("d", data)[0]
+                now = time.time()
+                new = change(tat, now)
+                self._tat = new
+                if fd is not None:
+                    os.pwrite(fd, struct.pack("d", new), 0)
+                return tat, now
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+    def _tolerance(self):
+        # how far ahead of now the arrival time may be before a caller has to wait
+        return (self.burst - 1) / self.rate
+
+    def reserve(self):
+        """Takes the next free slot; returns how many seconds to wait for it."""
+        interval = 1.0 / self.rate
+        tat, now = self._update(lambda tat, now: max(tat, now) + interval)
+        return max(0.0, max(tat, now) - self._tolerance() - now)
+
+    def acquire(self):
+        """Waits for the next free slot; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Holds back every caller for seconds, e.g. after a 429: no burst until then."""
+        tolerance = self._tolerance()
+        self._update(lambda tat, now: max(tat, now + seconds + tolerance))
+
+
+_buckets = {}
+
+
+def bucket(base):
+    """The TokenBucket of base, made on first use."""
+    b = _buckets.get(base)
+    if b is None:
+        b = _buckets.setdefault(base, TokenBucket(base))
+    return b
+
+
+def retryAfter(response):
+    """The seconds asked for in a Retry-After header, or None."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(status, attempt):
+    """Full-jitter exponential backoff; at least AirTable's penalty after a 429."""
+    delay = random.uniform(0, BACKOFF * (2**attempt))
+    if status == 429:
+        delay += PENALTY
+    return delay
+
+
+class RateLimitedApi(Api):
+    """
+    A pyairtable Api whose every request (each page of a listing included) waits for the
+    bucket of its base, and is retried on 429 and 503.
+    """
+
+    def __init__(self, api_key, **kwargs):
+        # retries are made here, where they can honour Retry-After and the buckets
+        kwargs.setdefault("retry_strategy", None)
+        super().__init__(api_key, **kwargs)
+
+    def request(self, method, url, *args, **kwargs):
+        base = baseOf(url)
+        limiter = bucket(base)
+        attempt = 0
+        while True:
+            _count(base, "requests")
+            waited = limiter.acquire()
+            if waited > 0:
+                _count(base, "queued")
+                _count(base, "queuedSeconds", waited)
+            try:
+                return super().request(method, url, *args, **kwargs)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in RETRY_STATUS:
+                    raise
+                _count(base, "throttled")
+                delay = retryAfter(e.response)
+                if delay is None:
+                    delay = backoff(status, attempt)
+                if attempt >= RETRIES or delay > MAX_WAIT:
+                    _count(base, "failed")
+                    raise
+                attempt += 1
+                _count(base, "retried")
+                logging.warning(
+                    "AirTable %s for %s; retry %d in %.1f s", status, base, attempt, delay
+                )
+                if status == 429:
+                    limiter.pause(delay)
+                else:
+                    time.sleep(delay)
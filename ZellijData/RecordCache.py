@@ -0,0 +1,141 @@
+"""
+Process-wide cache of AirTable responses, shared by every AirTableConnection, so the
+Field, Collection, Ontology and Model tables are not downloaded again by the page, each
+transformer and each exporter a few seconds apart.
+
+Entries are keyed by (base, table, kind of request, field projection, formula or record
+id), and expire after the TTL of their base: the "cachettl" of the base in
+AirTableDatabases (see setTTL), else AIRTABLE_CACHE_TTL seconds (default 60). A TTL of 0
+turns caching off for a base. At most AIRTABLE_CACHE_SIZE entries (default 2048) are
+kept, least recently used first out.
+
+Every caller gets its own copy of the records of a cached value, down to their "fields"
+dicts, so setting a record's key or field does not change what the other requests see.
+Field values themselves (lists of linked ids, attachments) are shared and must not be
+changed in place.
+
+With forceRefresh() on (the "refresh" query parameter of a request), every request to
+AirTable is made again, and its response replaces the cached one. invalidate() drops the
+entries of a base or a table, e.g. after writing to it.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+TTL = float(os.getenv("AIRTABLE_CACHE_TTL", "60"))
+SIZE = int(os.getenv("AIRTABLE_CACHE_SIZE", "2048"))
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_ttls = {}
+_stats = {"hits": 0, "misses": 0, "expired": 0, "refreshed": 0}
+_refresh = ContextVar("airtable_refresh", default=False)
+
+
+def setTTL(base, seconds):
+    """The TTL of base, in seconds; None (or "") for the default."""
+    if seconds is None or seconds == "":
+        _ttls.pop(base, None)
+    else:
+        _ttls[base] = float(seconds)
+
+
+def ttl(base):
+    return _ttls.get(base, TTL)
+
+
+def key(base, table, kind, fields=None, formula=None):
+    return (
+        base,
+        table,
+        kind,
+        tuple(fields) if fields else None,
+        None if formula is None else str(formula),
+    )
+
+
+def forceRefresh(on=True):
+    """Makes the requests of the current context (thread or request) skip the cache."""
+    _refresh.set(bool(on))
+
+
+def refreshing():
+    return _refresh.get()
+
+
+def _copy(value):
+    # the records and their "fields", which callers set; not the field values
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    if isinstance(value, dict):
+        value = dict(value)
+        if isinstance(value.get("fields"), dict):
+            value["fields"] = dict(value["fields"])
+    return value
+
+
+def get(k):
+    """The cached value of k, or None."""
+    if _refresh.get():
+        return None
+    with _lock:
+        entry = _memory.get(k)
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del _memory[k]
+            _stats["expired"] += 1
+            return None
+        _memory.move_to_end(k)
+        _stats["hits"] += 1
+    return _copy(value)
+
+
+def put(k, value):
+    seconds = ttl(k[0])
+    if seconds <= 0 or SIZE <= 0 or value is None:
+        return
+    value = _copy(value)
+    with _lock:
+        if _refresh.get() and k in _memory:
+            _stats["refreshed"] += 1
+        _memory[k] = (time.monotonic() + seconds, value)
+        _memory.move_to_end(k)
+        while len(_memory) > SIZE:
+            _memory.popitem(last=False)
+
+
+def cached(k, load):
+    """The cached value of k, else load(), which is kept unless it is None."""
+    value = get(k)
+    if value is None:
+        value = load()
+        put(k, value)
+    return value
+
+
+def invalidate(base=None, table=None):
+    """Drops the entries of table in base, of every table of base, or everything."""
+    with _lock:
+        for k in list(_memory):
+            if (base is None or k[0] == base) and (table is None or k[1] == table):
+                del _memory[k]
+
+
+def stats():
+    with _lock:
+        out = dict(_stats)
+        out["size"] = len(_memory)
+    return out
+
+
+def clear():
+    with _lock:
+        _memory.clear()
+        for k in _stats:
+            _stats[k] = 0
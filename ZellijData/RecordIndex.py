@@ -0,0 +1,94 @@
+"""
+Per-base indexes of the "ID" field of AirTable tables (ID -> record id), so that a group
+record asked for by its ID is fetched by record id, in one small request, rather than
+by listing the whole table.
+
+An index is built from one listing of the table with only the ID field, the first time
+it is asked for, in a background thread; until it is ready, callers find the record with
+a formula. It is rebuilt the same way once it is older than ZELLIJ_ID_INDEX_TTL seconds
+(default 300), and the old one is used meanwhile. A record id found in an index may be
+out of date, so callers check the record they get.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+
+TTL = float(os.getenv("ZELLIJ_ID_INDEX_TTL", "300"))
+
+RECORD_ID = re.compile(r"^rec[A-Za-z0-9]{14}$")
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def isRecordId(value):
+    return isinstance(value, str) and RECORD_ID.match(value) is not None
+
+
+class IDIndex(object):
+    """
+    ID -> record id of one table. load() returns the table's records (with at least
+    their "ID" field); it is called in a background thread.
+    """
+
+    def __init__(self, load, ttl=TTL):
+        self.load = load
+        self.ttl = ttl
+        self.ids = None
+        self.built = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def stale(self):
+        return self.ids is None or time.monotonic() - self.built > self.ttl
+
+    def refresh(self):
+        """Rebuilds the index now; a failed rebuild keeps the old one."""
+        try:
+            records = self.load()
+            ids = {}
+            for r in records:
+                value = r.get("fields", {}).get("ID")
+                if isinstance(value, str):
+                    ids.setdefault(value, r["id"])
+            self.ids = ids
+            self.built = time.monotonic()
+        except Exception as e:
+            logging.warning("Failed to index record IDs: %s", e)
+            if self.ids is not None:
+                # keep the old index for another ttl rather than retry on every lookup
+                self.built = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refreshInBackground(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def lookup(self, value):
+        """The record id of the record whose ID is value, or None if it is not known (yet)."""
+        if self.stale():
+            self.refreshInBackground()
+        ids = self.ids
+        return None if ids is None else ids.get(value)
+
+
+def index(base, table, load):
+    """The IDIndex of table in base, made on first use with load (see IDIndex)."""
+    k = (base, table)
+    with _lock:
+        if k not in _indexes:
+            _indexes[k] = IDIndex(load)
+        return _indexes[k]
+
+
+def clear():
+    with _lock:
+        _indexes.clear()
@@ -10,6 +10,9 @@ from rdflib.plugins.parsers.notation3 import BadSyntax
 
 from CRITERIA import criteria
 from website.tools import formatRDFerror, formatRDFwarnings
+from ZellijData import FragmentCache, GraphPool
+from ZellijData.FieldRecord import FieldRecord
+from ZellijData.FieldTable import FieldTable
 from ZellijData.RDFCodeBlock import RDFCodeBlock
 from ZellijData.TurtleCodeBlock import TurtleCodeBlock
 
@@ -44,6 +47,19 @@ class SingleGroupedItem(object):
         }
     }
 
+    Each field's Turtle is parsed once (see FragmentCache); the whole item's graph and
+    each group's graph (the ...ForPrefix methods) are unions of the fields' triples,
+    and each group's outputs are built once, until fields are added.
+
+    Turtle, RDFcode, RDFerror, OntologyGraph and InstanceGraph are computed on first
+    access, so pages that only show field data never parse RDF or draw diagrams.
+
+    With ZELLIJ_GRAPH_WORKERS set, the groups' JSON-LD and diagrams are built together in
+    a pool of processes (see GraphPool) when the first of them is asked for.
+
+    Each field is a FieldRecord, normalized for display once when it is added.
+    GroupedFields() is always a list of (prefix, [FieldRecord, ...]), set by groupFields()
+    from the columns of fieldTable().
     """
 
     def __init__(self, data={}):
@@ -51,7 +67,7 @@ class SingleGroupedItem(object):
         Constructor
         """
         self._GroupedData = dict()
-        self._GroupedFields = dict()
+        self._GroupedFields = []
         self._fieldCollections = dict()
         self.Identifier = ""
         self.Name = ""
@@ -70,12 +86,10 @@ class SingleGroupedItem(object):
 
         self.ExtraFields = data
 
-        self.Turtle = None
         self.TurtlePrefix = None
-        self.RDFcode = None
-        self.RDFerror = None
-        self.OntologyGraph = ""
-        self.InstanceGraph = ""
+        self._groupSpec = (None, None)
+        # derived from the fields, dropped when fields are added: see _forget()
+        self._forget()
 
     def __str__(self):
         txt = f'<Zellij.SingleGroupedItem "{self.ID}":{len(self._GroupedData)}>'
@@ -87,7 +101,7 @@ class SingleGroupedItem(object):
     # Define the Dictionary iterator functions
     def items(self):
         for k, v in self._GroupedData.items():
-            yield (k, self._stripbraces(v))
+            yield (k, v.plain())
 
     def keys(self):
         for k in self._GroupedData.keys():
@@ -95,48 +109,185 @@ class SingleGroupedItem(object):
 
     def values(self):
         for v in self._GroupedData.values():
-            yield self._stripbraces(v)
+            yield v.plain()
 
     def GroupedData(self):
         return self._GroupedData
 
-    def GroupedFields(self):
-        return self._GroupedFields
+    def GroupedFields(self, sortBy=None):
+        """[(prefix, [fields])] as grouped by groupFields(), each group sorted by sortBy if given."""
+        if sortBy is None:
+            return self._GroupedFields
+        field, groupOrder = self._groupSpec
+        return self.fieldTable().view(field, sortBy, groupOrder)
 
     def addFields(self, key, data):
-        d = {}
-        for k, v in data.items():
-            if k not in ["GroupBy"]:
-                d[k] = v
-        self._GroupedData[key] = d
+        self._GroupedData[key] = FieldRecord(key, data)
+        self._forget()
+
+    def fieldTable(self):
+        """The fields as a FieldTable, built once until fields are added."""
+        if self._fieldTable is None:
+            self._fieldTable = FieldTable(self._GroupedData.values())
+        return self._fieldTable
+
+    def groupFields(self, field=None, groupOrder=None):
+        """
+        Groups the fields by their value of field (all under "default" without one),
+        ordered by groupOrder (see FieldTable.view), and returns GroupedFields().
+        """
+        self._groupSpec = (field, groupOrder)
+        self._GroupedFields = self.fieldTable().view(field, None, groupOrder)
+        self._forPrefix = {}
+        return self._GroupedFields
+
+    def _forgetItem(self):
+        # the whole item's artefacts
+        self._Turtle = None
+        self._rdfParsed = False
+        self._RDFcode = None
+        self._RDFerror = None
+        self._OntologyGraph = None
+        self._InstanceGraph = None
+
+    def _forget(self):
+        # everything built from the fields
+        self._forgetItem()
+        self._fieldTurtle = {}
+        self._forPrefix = {}
+        self._fieldTable = None
+
+    # The graph artefacts, generated on first access.
+    @property
+    def Turtle(self):
+        if self._Turtle is None:
+            self.generateTurtle()
+        return self._Turtle
+
+    @Turtle.setter
+    def Turtle(self, value):
+        self._Turtle = value
+
+    @property
+    def RDFcode(self):
+        if not self._rdfParsed:
+            self.generateRDF()
+        return self._RDFcode
+
+    @RDFcode.setter
+    def RDFcode(self, value):
+        self._RDFcode = value
+
+    @property
+    def RDFerror(self):
+        if not self._rdfParsed:
+            self.generateRDF()
+        return self._RDFerror
+
+    @RDFerror.setter
+    def RDFerror(self, value):
+        self._RDFerror = value
+
+    @property
+    def OntologyGraph(self):
+        if self._OntologyGraph is None:
+            self._OntologyGraph = ""
+            self.generateOntologyGraph()
+        return self._OntologyGraph
+
+    @OntologyGraph.setter
+    def OntologyGraph(self, value):
+        self._OntologyGraph = value
+
+    @property
+    def InstanceGraph(self):
+        if self._InstanceGraph is None:
+            self._InstanceGraph = ""
+            self.generateInstanceGraph()
+        return self._InstanceGraph
+
+    @InstanceGraph.setter
+    def InstanceGraph(self, value):
+        self._InstanceGraph = value
 
     def addFieldCollection(self, key, data):
         self._fieldCollections[key] = data
 
-    def generateTurtle(self):
-        allturtle = "\n".join(
-            [
-                x["Turtle RDF"] if "Turtle RDF" in x else ""
-                for x in self._GroupedData.values()
-            ]
-        )
+    def _turtlePrefix(self):
         # logging.debug('*****eeeeeee******* %s', self.TurtlePrefix)
         if not self.TurtlePrefix:
             if "Turtle RDF" in self.ExtraFields:
                 tmp = TurtleCodeBlock(self.ExtraFields["Turtle RDF"])
                 self.TurtlePrefix = "\n".join(tmp.prefix)
-        if self.TurtlePrefix:
-            allturtle = self.TurtlePrefix + "\n\n" + allturtle
-            # logging.debug('*****alt******* %s', allturtle)
-        self.Turtle = TurtleCodeBlock(allturtle)
+        return self.TurtlePrefix
+
+    def _turtleOf(self, values):
+        """
+        The Turtle of the fields in values under the item's prefixes, as if their text
+        was joined, from the Turtle of each field, tokenized once (see _fieldBlock).
+        """
+        prefix = self._turtlePrefix()
+        turtle = TurtleCodeBlock(prefix + "\n") if prefix else TurtleCodeBlock()
+        for x in values:
+            if "Turtle RDF" in x:
+                turtle.extend(self._fieldBlock(x))
+            else:
+                turtle.add("")
+        return turtle
+
+    def generateTurtle(self):
+        self.Turtle = self._turtleOf(self._GroupedData.values())
         return self.Turtle
 
+    def _fieldName(self, values):
+        for k in ("Field", "ID", "UI_Name", "Field Name"):
+            name = values.get(k)
+            if isinstance(name, list) and name:
+                name = name[0]
+            if name and isinstance(name, str):
+                return name
+        return None
+
+    def _fieldBlock(self, values):
+        """The TurtleCodeBlock of one field, tokenized once."""
+        key = id(values)
+        if key not in self._fieldTurtle:
+            field = values["Turtle RDF"]
+            if not isinstance(field, TurtleCodeBlock):
+                field = TurtleCodeBlock(field)
+            # values is kept so that its id is not reused
+            self._fieldTurtle[key] = (values, field)
+        return self._fieldTurtle[key][1]
+
+    def _fragment(self, values):
+        """(field name, Turtle without @prefix lines) of one field."""
+        return (self._fieldName(values), "\n".join(self._fieldBlock(values).body))
+
+    def _composeRDF(self, values):
+        """
+        The RDFCodeBlock of the fields in values, by union of the cached triples of each
+        field's Turtle rather than by parsing their aggregate, where that means the same
+        (see FragmentCache).
+        Every field is parsed under the prefixes of the whole item, so each one is
+        parsed once, whichever group it is shown in.
+        """
+        turtle = self.Turtle
+        fragments = [self._fragment(x) for x in values if "Turtle RDF" in x]
+        graph = FragmentCache.compose(turtle.prefix, fragments)
+        return RDFCodeBlock.fromGraph(graph, readonly=True)
+
+    def _cachedForPrefix(self, key, build):
+        # The outputs for one group, built once; failures are not kept.
+        if key not in self._forPrefix:
+            self._forPrefix[key] = build()
+        return self._forPrefix[key]
+
     def generateRDF(self):
         try:
-            self.RDFerror = None
-            self.RDFcode = RDFCodeBlock(self.generateTurtle().text())
-            self.generateOntologyGraph()
-            self.generateInstanceGraph()
+            self._forgetItem()
+            self._rdfParsed = True
+            self.generateTurtle()
+            self.RDFcode = self._composeRDF(self._GroupedData.values())
         except BadSyntax as bs:
             self.RDFcode = None
             self.RDFerror = self._formatRDFerror(bs)
@@ -145,7 +296,7 @@ class SingleGroupedItem(object):
     def generateOntologyGraph(self):
         if not self.RDFerror:
             try:
-                self.OntologyGraph = criteria.ontology(self.RDFcode.turtle())
+                self.OntologyGraph = criteria.ontology(self.RDFcode.graph, budget=criteria.BUDGET)
                 # logging.debug('%s*****ontologygraph*******', self.OntologyGraph)
 
             except Exception as e:
@@ -154,75 +305,114 @@ class SingleGroupedItem(object):
     def generateInstanceGraph(self):
         if not self.RDFerror:
             try:
-                self.InstanceGraph = criteria.instance(self.RDFcode.turtle())
+                self.InstanceGraph = criteria.instance(self.RDFcode.graph, budget=criteria.BUDGET)
             except Exception as e:
                 self.InstanceGraph = str(e)
 
+    def _prefixValues(self, prefix):
+        for item in self._GroupedFields:
+            if item[0] == prefix:
+                return item[1]
+        return None
+
     def generateTurtleForPrefix(self, prefix):
-        values = None
-        if isinstance(self._GroupedFields, list):
-            for item in self._GroupedFields:
-                if item[0] == prefix:
-                    values = item[1]
-                    break
-        elif isinstance(self._GroupedFields, dict):
-            values = self._GroupedFields.get(prefix)
-        else:
-            return TurtleCodeBlock("")
+        return self._cachedForPrefix(
+            (prefix, "turtle"), lambda: self._turtleForPrefix(prefix)
+        )
 
+    def _turtleForPrefix(self, prefix):
+        values = self._prefixValues(prefix)
         if values is None:
             return TurtleCodeBlock("")
+        return self._turtleOf(values)
 
-        allturtle = "\n".join(
-            [x["Turtle RDF"] if "Turtle RDF" in x else "" for x in values]
-        )
-        # logging.debug('*****eeeeeee******* %s', self.TurtlePrefix)
-        if not self.TurtlePrefix:
-            if "Turtle RDF" in self.ExtraFields:
-                tmp = TurtleCodeBlock(self.ExtraFields["Turtle RDF"])
-                self.TurtlePrefix = "\n".join(tmp.prefix)
-        if self.TurtlePrefix:
-            allturtle = self.TurtlePrefix + "\n\n" + allturtle
-            # logging.debug('*****alt******* %s', allturtle)
-        turtle = TurtleCodeBlock(allturtle)
-        return turtle
-
-    def generateOntologyGraphForPrefix(self, prefix):
-        values = self._GroupedFields.get(prefix)
+    def generateOntologyGraphForPrefix(self, prefix, full=False):
+        values = self._prefixValues(prefix)
         if values is None:
             return ""
 
+        self._prefetchGroups(full)
         try:
-            rdf = RDFCodeBlock(self.generateTurtleForPrefix(prefix).text())
-            return criteria.ontology(rdf.turtle())
+            return self._cachedForPrefix(
+                (prefix, "ontology", full),
+                lambda: criteria.ontology(
+                    self.generateRDFForPrefix(prefix).graph,
+                    budget=None if full else criteria.BUDGET,
+                ),
+            )
         except BadSyntax as bs:
             rdf = str(bs)
             return rdf
 
-    def generateInstanceGraphForPrefix(self, prefix):
-        values = self._GroupedFields.get(prefix)
+    def generateInstanceGraphForPrefix(self, prefix, full=False):
+        values = self._prefixValues(prefix)
         if values is None:
             return ""
 
+        self._prefetchGroups(full)
         try:
-            rdf = RDFCodeBlock(self.generateTurtleForPrefix(prefix).text())
-            return criteria.ontology(rdf.turtle())
+            return self._cachedForPrefix(
+                (prefix, "instance", full),
+                lambda: criteria.instance(
+                    self.generateRDFForPrefix(prefix).graph,
+                    budget=None if full else criteria.BUDGET,
+                ),
+            )
         except BadSyntax as bs:
             rdf = str(bs)
             return rdf
 
+    def generateRDFForPrefix(self, prefix):
+        """The RDFCodeBlock of one group of fields; may raise BadSyntax."""
+        return self._cachedForPrefix(
+            (prefix, "rdf"),
+            lambda: self._composeRDF(self._prefixValues(prefix) or []),
+        )
+
     def generateJsonLDForPrefix(self, prefix):
-        values = self._GroupedFields.get(prefix)
+        values = self._prefixValues(prefix)
         if values is None:
             return ""
 
+        self._prefetchGroups(False)
         try:
-            rdf = RDFCodeBlock(self.generateTurtleForPrefix(prefix).text())
-            return rdf.jsonld()
+            return self._cachedForPrefix(
+                (prefix, "jsonld"), lambda: self.generateRDFForPrefix(prefix).jsonld()
+            )
         except BadSyntax as bs:
             rdf = str(bs)
             return rdf
 
+    def generateGroupGraphs(self, full=False):
+        """
+        Builds the JSON-LD and both diagrams of every group not built yet, in the
+        GraphPool workers when ZELLIJ_GRAPH_WORKERS is set; the ...ForPrefix methods
+        then return them. Groups that fail are left to those methods.
+        """
+        turtle = self.Turtle
+        todo = [
+            (prefix, values)
+            for prefix, values in self._GroupedFields
+            if (prefix, "ontology", full) not in self._forPrefix
+        ]
+        jobs = [
+            (turtle.prefix, [self._fragment(x) for x in values if "Turtle RDF" in x])
+            for _, values in todo
+        ]
+        results = GraphPool.run(jobs, budget=None if full else criteria.BUDGET)
+        for (prefix, _), out in zip(todo, results):
+            if out.error:
+                continue
+            self._forPrefix[(prefix, "jsonld")] = out.jsonld
+            self._forPrefix[(prefix, "ontology", full)] = out.ontology
+            self._forPrefix[(prefix, "instance", full)] = out.instance
+
+    def _prefetchGroups(self, full):
+        # With a pool, asking for one group's graphs builds them all at once.
+        if GraphPool.enabled() and (full, "groups") not in self._forPrefix:
+            self._forPrefix[(full, "groups")] = True
+            self.generateGroupGraphs(full)
+
     def rdf_warnings(self):
         if self.RDFcode and self.RDFcode.warnings:
             return self._formatRDFwarnings(self.RDFcode.warnings)
@@ -266,17 +456,5 @@ class SingleGroupedItem(object):
         self.lines = lines
         self._uri = uri
         """
-        return formatRDFerror(err, self.Name)
-
-    def _stripbraces(self, val):
-        """
-        When an AirTable field is a referenced field, it appears as a one-entry list, which if left as-is
-        will display in the Jinja template as "['actual text']" with the Python list representation. We
-        have to convert them from one-entry lists to strings to make this stop.
-        """
-        if isinstance(val, list) and len(val) == 1:
-            val = val[0]
-        if isinstance(val, dict):
-            for k, v in val.items():
-                val[k] = self._stripbraces(v)
-        return val
+        field = getattr(err, "field", None)
+        return formatRDFerror(err, f"{self.Name}: {field}" if field else self.Name)
@@ -7,12 +7,49 @@ Created on Mar. 9, 2021
 import re
 import html
 
+PREFIX = "prefix"
+BODY = "body"
+WARNING = "warning"
+
+_PREFIX = re.compile(r"^\s*(\@prefix .*?\s+\<[^>]*\>\s+\.)\s*?(.*)")
+_EMPTY_URI = re.compile(r"\<\s*\>")
+
+
+def tokenize(text, fillEmptyURI=True):
+    """
+    Split Turtle into lines, yielding (line number, kind, text) where kind is
+    PREFIX (an @prefix declaration), BODY (any other line, without trailing whitespace)
+    or WARNING (the text is the message). Empty URL references < > are replaced by
+    <http://UNKNOWN>, with a warning, unless fillEmptyURI is False.
+    Shared by TurtleCodeBlock and RDFCodeBlock.sanitizeTurtle.
+    """
+    for i, ln in enumerate(text.splitlines(), start=1):
+        m = _PREFIX.match(ln) if "@prefix" in ln else None
+        if m:
+            yield i, PREFIX, m.group(1)
+            if not m.group(2):
+                continue
+            yield i, WARNING, "Missing newline between prefix and body."
+            ln = m.group(2)
+        t = ln.rstrip()
+        if t != ln:
+            yield i, WARNING, "Trailing whitespace."
+        if fillEmptyURI and "<" in t and _EMPTY_URI.search(t):
+            # Empty URL reference will get replaced with local file name when passed to RDF.
+            # Must fill it with something that includes a transport protocol, and also throw a warning.
+            t = _EMPTY_URI.sub("<http://UNKNOWN>", t)
+            yield i, WARNING, "Empty URL reference < >"
+        yield i, BODY, t
+
 
 class TurtleCodeBlock(object):
     """
     A small data structure for handling Turtle (Terse RDL Triple Language) code.
-    Additive; can build up Turtle from components.
+    Additive; can build up Turtle from components: add() only reads the new text.
     https://www.w3.org/TR/turtle/
+
+    The text is kept until prefix or body change, through add(), extend(), assigning
+    them, or changed() after editing their lists in place.
     """
 
     def __init__(self, *args):
@@ -22,6 +59,9 @@ class TurtleCodeBlock(object):
         self.originaltext = ""
         if len(args) > 0:
             self.originaltext = "\n".join(args)
+        self._revision = 0
+        self._text = None
+        self._lines = 0  # source lines read, as if joined by newlines
         self.prefix = []
         self.body = []
         self.warnings = None
@@ -29,49 +69,71 @@ class TurtleCodeBlock(object):
         for arg in args:
             self.add(arg)
 
+    @property
+    def prefix(self):
+        return self._prefix
+
+    @prefix.setter
+    def prefix(self, lines):
+        self._prefix = lines
+        self._prefixes = set(lines)
+        self.changed()
+
+    @property
+    def body(self):
+        return self._body
+
+    @body.setter
+    def body(self, lines):
+        self._body = lines
+        self.changed()
+
+    def changed(self):
+        """Marks prefix or body as changed, so the text is made again."""
+        self._revision += 1
+
     def add(self, text):
         """Set the warnings and errors to empty lists. If they are None then code block hasn't yet been parsed."""
         if self.warnings is None:
             self.warnings = []
         if self.errors is None:
             self.errors = []
+        self.changed()
 
-        for i, ln in enumerate(text.splitlines(), start=1):
-            m = re.match(r"^\s*(\@prefix .*?\s+\<[^>]*\>\s+\.)\s*?(.*)", ln)
-            if m:
-                if m.group(1) and not m.group(1) in self.prefix:
-                    t = m.group(1).rstrip()
-                    if t != m.group(1):
-                        self.warnings.append(
-                            {"line": i, "text": "Trailing whitespace."}
-                        )
-                    self.prefix.append(t)
-                if m.group(2):
-                    self.warnings.append(
-                        {"line": i, "text": "Missing newline between prefix and body."}
-                    )
-                    t = self._addLine(i, m.group(2))
-                    if t:
-                        self.body.append(t)
-            else:
-                t = self._addLine(i, ln)
+        for i, kind, t in tokenize(text):
+            if kind is BODY:
+                # skip empty lines
                 if t:
                     self.body.append(t)
+            elif kind is PREFIX:
+                if t not in self._prefixes:
+                    self._prefixes.add(t)
+                    self.prefix.append(t)
+            else:
+                self.warnings.append({"line": self._lines + i, "text": t})
+        self._lines += len((text + "\n").splitlines())
 
-    def _addLine(self, ln, text):
-        if text.strip == "":
-            # skip empty lines
-            return
-        t = text.rstrip()
-        if t != text:
-            self.warnings.append({"line": ln, "text": "Trailing whitespace."})
-        m = re.search(r"\<\s*\>", t)
-        if m:
-            # Empty URL reference will get replaced with local file name when passed to RDF.
-            # Must fill it with something that includes a transport protocol, and also throw a warning.
-            t = re.sub(r"\<\s*\>", "<http://UNKNOWN>", t)
-            self.warnings.append({"line": ln, "text": "Empty URL reference < >"})
-        return t
+    def extend(self, other):
+        """
+        Append another TurtleCodeBlock, without reading its text again: the same as
+        add() of its text, warning line numbers included.
+        """
+        if self.warnings is None:
+            self.warnings = []
+        if self.errors is None:
+            self.errors = []
+        self.changed()
+        for t in other.prefix:
+            if t not in self._prefixes:
+                self._prefixes.add(t)
+                self.prefix.append(t)
+        self.body.extend(other.body)
+        self.warnings.extend(
+            {"line": self._lines + w["line"], "text": w["text"]} for w in other.warnings or []
+        )
+        self.errors.extend(other.errors or [])
+        self._lines += other._lines
+        return self
 
     def html(self):
         return html.escape(self.stringify())
@@ -80,12 +142,15 @@ class TurtleCodeBlock(object):
         return self.stringify()
 
     def stringify(self):
-        txt = ""
-        txt += "\n".join(self.prefix)
-        if self.prefix:
-            txt += "\n\n"
-        txt += "\n".join(self.body)
-        return txt
+        # kept until prefix or body change
+        if self._text is None or self._text[0] != self._revision:
+            txt = ""
+            txt += "\n".join(self.prefix)
+            if self.prefix:
+                txt += "\n\n"
+            txt += "\n".join(self.body)
+            self._text = (self._revision, txt)
+        return self._text[1]
 
     def __str__(self):
         return f"<Turtle_RDF: {self.linecount()} lines>"
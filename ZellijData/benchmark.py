@@ -0,0 +1,90 @@
+"""
+Times the Turtle line tokenizer (TurtleCodeBlock) on an aggregate of field fragments
+like the one SingleGroupedItem builds for a model, about 10k lines by default.
+
+    python -m ZellijData.benchmark [--fields 500] [--repeat 5]
+"""
+
+import argparse
+import time
+
+from ZellijData.RDFCodeBlock import RDFCodeBlock
+from ZellijData.TurtleCodeBlock import TurtleCodeBlock
+
+PREFIXES = """@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix la: <https://linked.art/ns/terms/> .
+"""
+
+
+def fragment(i):
+    """The Turtle of one field: 20 lines, each repeating the common prefixes."""
+    uri = f"<https://linked.art/example/object/{i}>"
+    return PREFIXES + "\n".join(
+        [
+            f"{uri} a crm:E22_Human-Made_Object ;",
+            f'    rdfs:label "Object {i}" ;',
+            f"    crm:P1_is_identified_by <https://linked.art/example/name/{i}> ;",
+            f"    crm:P2_has_type <https://linked.art/example/type/{i % 17}> ;",
+            f"    crm:P108i_was_produced_by <https://linked.art/example/production/{i}> .",
+            f"<https://linked.art/example/name/{i}> a crm:E33_E41_Linguistic_Appellation ;  ",
+            f'    crm:P190_has_symbolic_content "Name {i}" .',
+            f"<https://linked.art/example/production/{i}> a crm:E12_Production ;",
+            f"    crm:P4_has_time-span <https://linked.art/example/time/{i}> ;",
+            "    crm:P14_carried_out_by < > .",
+            f"<https://linked.art/example/time/{i}> a crm:E52_Time-Span ;",
+            '    crm:P82a_begin_of_the_begin "1900-01-01T00:00:00"^^xsd:dateTime ;',
+            '    crm:P82b_end_of_the_end "1900-12-31T23:59:59"^^xsd:dateTime .',
+            "",
+            f"<https://linked.art/example/type/{i % 17}> a crm:E55_Type ;",
+            f'    rdfs:label "Type {i % 17}" .',
+        ]
+    )
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None or elapsed < best else best
+    return best
+
+
+def appended(fragments):
+    block = TurtleCodeBlock()
+    for f in fragments:
+        block.add(f)
+    return block
+
+
+def extended(blocks):
+    block = TurtleCodeBlock()
+    for b in blocks:
+        block.extend(b)
+    return block
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Turtle tokenizer")
+    parser.add_argument("--fields", type=int, default=500, help="number of field fragments")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args()
+
+    fragments = [fragment(i) for i in range(args.fields)]
+    aggregate = "\n".join(fragments)
+    blocks = [TurtleCodeBlock(f) for f in fragments]
+    print(f"aggregate: {len(aggregate.splitlines())} lines, {args.fields} fragments")
+    print(f"  whole      {timed(lambda: TurtleCodeBlock(aggregate), args.repeat) * 1000:9.1f} ms")
+    print(f"  add        {timed(lambda: appended(fragments), args.repeat) * 1000:9.1f} ms")
+    print(f"  extend     {timed(lambda: extended(blocks), args.repeat) * 1000:9.1f} ms")
+    block = TurtleCodeBlock(aggregate)
+    print(f"  text x10   {timed(lambda: [block.text() for _ in range(10)], args.repeat) * 1000:9.1f} ms")
+    rdf = RDFCodeBlock()
+    print(f"  sanitize   {timed(lambda: rdf.sanitizeTurtle(aggregate), args.repeat) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
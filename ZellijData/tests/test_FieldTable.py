@@ -0,0 +1,47 @@
+import unittest
+
+from ZellijData.FieldRecord import FieldRecord
+from ZellijData.FieldTable import FieldTable
+
+
+def linked(id, order):
+    return [{"id": f"rec{id}", "fields": {"ID": id, "Order": order}}]
+
+
+class TestFieldTable(unittest.TestCase):
+    def setUp(self):
+        rows = [
+            ("f1", {"Field": ["F1"], "Index": "10", "Name": "b", "Category": linked("Names", "2")}),
+            ("f2", {"Field": ["F2"], "Index": "9", "Name": "A", "Category": linked("Dates", "1")}),
+            ("f3", {"Field": ["F3"], "Index": "", "Name": "c", "Category": linked("Names", "2")}),
+            ("f4", {"Field": ["F4"], "Index": "11", "Name": "d"}),
+        ]
+        self.table = FieldTable(FieldRecord(k, v) for k, v in rows)
+
+    def keys(self, records):
+        return [r.key for r in records]
+
+    def test_TypedOrder(self):
+        # numbers as numbers, text without case, empty values last
+        self.assertEqual(self.table.order("Index"), [1, 0, 3, 2])
+        self.assertEqual(self.table.order("Name"), [1, 0, 2, 3])
+        self.assertIs(self.table.order("Index"), self.table.order("Index"))
+
+    def test_View(self):
+        view = self.table.view("Category", "Index", ("Category", "Order"))
+        self.assertEqual([(g, self.keys(r)) for g, r in view], [("Dates", ["f2"]), ("Names", ["f1", "f3"]), ("default", ["f4"])])
+        self.assertIs(self.table.view("Category", "Index", ("Category", "Order")), view)
+        self.assertEqual(self.keys(self.table.view()[0][1]), ["f1", "f2", "f3", "f4"])
+
+    def test_SelectAndCoerce(self):
+        self.assertEqual(self.keys(self.table.select("Field", "F3")), ["f3"])
+        self.assertEqual(self.table.select("Field", "F9"), [])
+        self.assertFalse(self.table.coerceNumeric("Index"))
+        self.table.rows[2]["Index"] = "12"
+        table = FieldTable(self.table.rows)
+        self.assertTrue(table.coerceNumeric("Index"))
+        self.assertEqual(table.rows[0]["Index"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
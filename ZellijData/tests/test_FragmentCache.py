@@ -0,0 +1,91 @@
+import unittest
+
+from rdflib import Graph
+from rdflib.compare import isomorphic
+from rdflib.plugins.parsers.notation3 import BadSyntax
+
+from ZellijData import FragmentCache
+from ZellijData.RDFCodeBlock import RDFCodeBlock
+
+PREFIXES = [
+    "@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .",
+    "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .",
+]
+FIELDS = [
+    ("Name", '<https://linked.art/example/actor/E39> a crm:E39_Actor ;\n    rdfs:label "Actor" .'),
+    ("Birth", "<https://linked.art/example/actor/E39> crm:P98i_was_born <https://linked.art/example/birth/1> ."),
+    ("Type", "<https://linked.art/example/actor/E39> a crm:E39_Actor ."),
+]
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        FragmentCache.clear()
+
+    def test_ComposeMatchesParse(self):
+        graph = FragmentCache.compose(PREFIXES, FIELDS)
+        aggregate = "\n".join(PREFIXES) + "\n\n" + "\n".join(t for _, t in FIELDS)
+        self.assertTrue(isomorphic(graph, Graph().parse(data=aggregate, format="turtle")))
+        self.assertEqual(len(graph), 3)
+        self.assertEqual(RDFCodeBlock.fromGraph(graph).turtle(), RDFCodeBlock(aggregate).turtle())
+
+    def test_FragmentsParsedOnce(self):
+        FragmentCache.compose(PREFIXES, FIELDS[:2])
+        FragmentCache.compose(PREFIXES, FIELDS[1:])
+        # the prefix block and the three fields
+        self.assertEqual(FragmentCache.stats()["misses"], 4)
+        first = FragmentCache.compose(PREFIXES, FIELDS[1:])
+        second = FragmentCache.compose(PREFIXES, FIELDS[1:])
+        self.assertEqual(FragmentCache.stats()["graphHits"], 2)
+        # each caller has its own graph
+        self.assertIsNot(first, second)
+        self.assertEqual(set(first), set(second))
+        self.assertIsNot(first.namespace_manager, second.namespace_manager)
+        # what the diagram cache keys them on
+        self.assertEqual(first.contentKey, second.contentKey)
+        with self.assertRaises(TypeError):
+            first.add(next(iter(first)))
+
+    def test_JoinedWhenFieldsDependOnEachOther(self):
+        aggregate = lambda fields: "\n".join(PREFIXES) + "\n\n" + "\n".join(t for _, t in fields)
+        # one blank node named in two fields
+        shared = [
+            ("Name", "_:b a crm:E39_Actor ."),
+            ("Label", '_:b rdfs:label "Actor" .'),
+        ]
+        graph = FragmentCache.compose(PREFIXES, shared)
+        self.assertEqual(len(set(graph.subjects())), 1)
+        self.assertTrue(isomorphic(graph, Graph().parse(data=aggregate(shared), format="turtle")))
+        # a statement split across fields
+        split = [
+            ("Name", "<https://linked.art/example/actor/E39> a crm:E39_Actor ;"),
+            ("Label", '    rdfs:label "Actor" .'),
+        ]
+        graph = FragmentCache.compose(PREFIXES, split)
+        self.assertEqual(len(graph), 2)
+
+    def test_RepeatedAnonymousNodes(self):
+        repeated = [("Name", '<https://linked.art/example/actor/E39> crm:P1 [ rdfs:label "Actor" ] .')] * 2
+        graph = FragmentCache.compose(PREFIXES, repeated)
+        # two nodes, as in the joined text
+        self.assertEqual(len(graph), 4)
+
+    def test_ErrorNamesFieldOfJoinedText(self):
+        fields = [
+            ("Start", '<https://linked.art/example/actor/E39> rdfs:label "Actor" ;'),
+            ("Middle", "    crm:P2 <https://linked.art/example/type/1> ;"),
+            ("End", "    <https://linked.art/example/p> ."),
+        ]
+        with self.assertRaises(BadSyntax) as cm:
+            FragmentCache.compose(PREFIXES, fields)
+        # "Start" does not parse alone, but the joined text breaks in "End"
+        self.assertEqual(cm.exception.field, "End")
+
+    def test_ErrorNamesField(self):
+        with self.assertRaises(BadSyntax) as cm:
+            FragmentCache.compose(PREFIXES, FIELDS + [("Broken", "<a> <b> .")])
+        self.assertEqual(cm.exception.field, "Broken")
+
+
+if __name__ == "__main__":
+    unittest.main()
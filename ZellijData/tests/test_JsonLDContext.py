@@ -0,0 +1,47 @@
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ZellijData import JsonLDContext
+from ZellijData.RDFCodeBlock import RDFCodeBlock
+
+TURTLE = """@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+<https://linked.art/example/actor/E39> a crm:E39_Actor ;
+    rdfs:label "Actor" .
+"""
+OTHER = "https://example.org/context.json"
+
+
+class TestContextRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_BundledLinkedArtIsOffline(self):
+        with mock.patch.object(JsonLDContext, "source_to_json", side_effect=OSError("offline")):
+            out = json.loads(RDFCodeBlock(TURTLE).jsonld())
+        self.assertEqual(out["@context"], JsonLDContext.LINKED_ART)
+        self.assertEqual(out["type"], "Actor")
+        self.assertEqual(out["_label"], "Actor")
+
+    def test_OtherContextsFetchedOnce(self):
+        document = {"@context": {"crm": "http://www.cidoc-crm.org/cidoc-crm/"}}
+        with mock.patch.object(JsonLDContext, "source_to_json", return_value=document) as fetch:
+            JsonLDContext.ContextRegistry(directory=self.tmp).context(OTHER)
+            # a new process, with the disk cache
+            registry = JsonLDContext.ContextRegistry(directory=self.tmp)
+            first = registry.context(OTHER)
+            self.assertIs(registry.context(OTHER), first)
+        self.assertEqual(fetch.call_count, 1)
+        out = json.loads(registry.serialize(RDFCodeBlock(TURTLE).graph, OTHER))
+        self.assertEqual(out["@context"], OTHER)
+        self.assertEqual(out["@type"], "crm:E39_Actor")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from ZellijData import RecordCache
+from ZellijData.AirTableConnection import AirTableConnection, record_id_formulas
+
+
+def rec(i):
+    return f"rec{i:014d}"
+
+
+class FakeTable(object):
+    def __init__(self, ids):
+        self.records = {x: {"id": x, "fields": {"ID": f"F{x[-3:]}", "Name": "n"}} for x in ids}
+        self.formulas = []
+
+    def all(self, formula=None, fields=None):
+        self.formulas.append(formula)
+        return [r for x, r in self.records.items() if f"'{x}'" in formula]
+
+
+class TestLinkedRecords(unittest.TestCase):
+    def setUp(self):
+        RecordCache.clear()
+        self.table = FakeTable([rec(i) for i in range(1000)])
+        self.conn = AirTableConnection("token", "appX")
+        self.conn.airtable = mock.Mock()
+        self.conn.airtable.table.return_value = self.table
+
+    def test_Chunks(self):
+        ids = [rec(i) for i in range(1000)]
+        formulas = record_id_formulas(ids, limit=2000)
+        self.assertGreater(len(formulas), 1)
+        self.assertTrue(all(len(f) <= 2000 for f in formulas))
+        self.assertEqual(sum(f.count("RECORD_ID()") for f in formulas), 1000)
+
+    def test_Resolve(self):
+        ids = [rec(5), rec(3), rec(5), "recMissing000000"]
+        with mock.patch("ZellijData.AirTableConnection.FORMULA_LIMIT", 50):
+            out = self.conn.get_records_by_id("Field", ids)
+        self.assertEqual(list(out), [rec(5), rec(3)])
+        # one request per distinct id at this limit
+        self.assertEqual(len(self.table.formulas), 3)
+
+        self.assertEqual(self.conn.get_records_by_id("Field", [rec(3)])[rec(3)]["fields"]["ID"], "F003")
+        self.assertEqual(len(self.table.formulas), 3)
+
+    def test_ListOfGroups(self):
+        def field(name, linked=None):
+            return SimpleNamespace(name=name, options=SimpleNamespace(linked_table_id=linked))
+
+        models = mock.Mock()
+        models.all.return_value = [
+            {"id": "recM", "fields": {"ID": "M1", "Collection": [rec(7), rec(2)], "Model_fields": ["recF"]}}
+        ]
+        models.schema.return_value = SimpleNamespace(
+            fields=[field("ID"), field("Collection", "tblCollection"), field("Model_fields", "tblFields")]
+        )
+        collections = mock.Mock()
+        collections.schema.return_value = SimpleNamespace(fields=[field("ID"), field("Name")])
+        collections.all.return_value = [self.table.records[rec(i)] for i in range(10)]
+        fields = mock.Mock()
+        fields.schema.return_value = SimpleNamespace(fields=[field("Name")])
+        fields.all.return_value = [{"id": "recF", "fields": {"Name": "title"}}]
+        tables = {"Model": models, "tblCollection": collections, "tblFields": fields}
+        self.conn.airtable.table.side_effect = lambda base, name: tables[name]
+
+        schema = {
+            "Model_fields": {"GroupBy": "Model", "Name": "Field Name"},
+            "Model": {"ID": "ID", "Collection": "Collection"},
+        }
+        with mock.patch.object(self.conn, "get_linked_names", wraps=self.conn.get_linked_names) as names:
+            (out,) = self.conn.getListOfGroups(schema)
+        self.assertEqual(out["Collection"], "F007, F002")
+        self.assertEqual(out["Contains"], "title")
+        # each linked table is listed once, with only the fields shown
+        collections.all.assert_called_once_with(fields=["ID", "Name"])
+        fields.all.assert_called_once_with(fields=["Name"])
+        self.assertEqual(names.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from rdflib import Graph, Literal, URIRef
+
+from ZellijData.RDFCodeBlock import RDFCodeBlock
+
+TURTLE = """@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+<https://linked.art/example/actor/E39> a crm:E39_Actor ;
+    rdfs:label "Actor" .
+"""
+TRIPLE = (
+    URIRef("https://linked.art/example/actor/E39"),
+    URIRef("http://www.w3.org/2000/01/rdf-schema#comment"),
+    Literal("added"),
+)
+
+
+class TestSerialization(unittest.TestCase):
+    def test_SerializedOncePerFormat(self):
+        block = RDFCodeBlock(TURTLE)
+        with mock.patch.object(Graph, "serialize", autospec=True, side_effect=Graph.serialize) as serialize:
+            first = block.turtle()
+            self.assertEqual(block.turtle(), first)
+            self.assertEqual(str(block), first)
+            block.print(style="nt")
+            block.print(style="nt")
+            self.assertEqual(serialize.call_count, 2)
+
+    def test_ChangeInvalidates(self):
+        block = RDFCodeBlock(TURTLE)
+        before = block.turtle()
+        block.graph.add(TRIPLE)
+        self.assertNotEqual(block.turtle(), before)
+        self.assertIn('"added"', block.turtle())
+
+    def test_ReadOnly(self):
+        block = RDFCodeBlock(TURTLE, readonly=True)
+        self.assertIsNone(block.originaltext)
+        self.assertEqual(len(block.graph), 2)
+        with self.assertRaises(TypeError):
+            block.graph.add(TRIPLE)
+        self.assertEqual(RDFCodeBlock(TURTLE).originaltext, TURTLE)
+
+
+
+class TestValidateURI(unittest.TestCase):
+    def test_InvalidURIsOnceInOrder(self):
+        block = RDFCodeBlock(
+            TURTLE
+            + "<https://linked.art/example/type/229 _2> a crm:E55_Type .\n"
+            + "<https://linked.art/example/actor/E39> crm:P2_has_type <https://linked.art/example/type/229 _2> .\n"
+            + "<https://linked.art/example/type/231|2> a crm:E55_Type .\n"
+        )
+        self.assertEqual(
+            block.warnings,
+            ["https://linked.art/example/type/229 _2", "https://linked.art/example/type/231|2"],
+        )
+        self.assertIsNone(RDFCodeBlock(TURTLE).warnings)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+from pyairtable import Api
+
+from ZellijData import RateLimiter
+
+
+def httpError(status, retryAfter=None):
+    response = requests.Response()
+    response.status_code = status
+    if retryAfter is not None:
+        response.headers["Retry-After"] = retryAfter
+    return requests.HTTPError(f"{status}", response=response)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        RateLimiter.resetMetrics()
+        RateLimiter._buckets.clear()
+
+    def tearDown(self):
+        RateLimiter._buckets.clear()
+        self.directory.cleanup()
+
+    def test_BucketSharedThroughFile(self):
+        # two buckets on one file stand in for two processes
+        a = RateLimiter.TokenBucket("appX", rate=10, burst=2, directory=self.directory.name)
+        b = RateLimiter.TokenBucket("appX", rate=10, burst=2, directory=self.directory.name)
+        with mock.patch("time.time", return_value=1000.0):
+            self.assertEqual(a.reserve(), 0)
+            self.assertEqual(b.reserve(), 0)
+            self.assertAlmostEqual(a.reserve(), 0.1)
+            self.assertAlmostEqual(b.reserve(), 0.2)
+
+    def test_PauseWaitsTheWholeTime(self):
+        bucket = RateLimiter.TokenBucket("appX", rate=5, burst=5, directory=self.directory.name)
+        with mock.patch("time.time", return_value=1000.0):
+            bucket.pause(3)
+            self.assertGreaterEqual(bucket.reserve(), 3)
+            # then back to the sustained rate
+            self.assertAlmostEqual(bucket.reserve(), 3.2)
+
+    def test_BaseOf(self):
+        self.assertEqual(RateLimiter.baseOf("https://api.airtable.com/v0/appAbc123/Field"), "appAbc123")
+        self.assertEqual(RateLimiter.baseOf("https://api.airtable.com/v0/meta/bases/appAbc123/tables"), "appAbc123")
+        self.assertEqual(RateLimiter.baseOf("https://api.airtable.com/v0/meta/bases"), "")
+
+    def test_RetryHonoursRetryAfter(self):
+        url = "https://api.airtable.com/v0/appX/Field"
+        bucket = RateLimiter.TokenBucket("appX", rate=1000, directory=self.directory.name)
+        RateLimiter._buckets["appX"] = bucket
+        responses = [httpError(503, "2"), httpError(429, "1"), {"records": []}]
+
+        def request(*args, **kwargs):
+            r = responses.pop(0)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        api = RateLimiter.RateLimitedApi("key")
+        with mock.patch.object(Api, "request", side_effect=request), mock.patch(
+            "time.sleep"
+        ) as sleep, mock.patch.object(bucket, "pause") as pause:
+            self.assertEqual(api.request("get", url), {"records": []})
+        sleep.assert_any_call(2.0)
+        pause.assert_called_once_with(1.0)
+        m = RateLimiter.metrics()["appX"]
+        self.assertEqual((m["requests"], m["throttled"], m["retried"], m["failed"]), (3, 2, 2, 0))
+
+    def test_GivesUp(self):
+        bucket = RateLimiter.TokenBucket("appX", rate=1000, directory=self.directory.name)
+        RateLimiter._buckets["appX"] = bucket
+        api = RateLimiter.RateLimitedApi("key")
+        with mock.patch.object(Api, "request", side_effect=httpError(429, "3600")):
+            with self.assertRaises(requests.HTTPError):
+                api.request("get", "https://api.airtable.com/v0/appX/Field")
+        with mock.patch.object(Api, "request", side_effect=httpError(404)):
+            with self.assertRaises(requests.HTTPError):
+                api.request("get", "https://api.airtable.com/v0/appX/Field")
+        m = RateLimiter.metrics()["appX"]
+        self.assertEqual((m["requests"], m["throttled"], m["retried"], m["failed"]), (2, 1, 0, 1))
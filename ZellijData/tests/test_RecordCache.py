@@ -0,0 +1,75 @@
+import threading
+import unittest
+from unittest import mock
+
+from ZellijData import RecordCache
+
+
+class TestRecordCache(unittest.TestCase):
+    def setUp(self):
+        RecordCache.clear()
+        self.loads = 0
+
+    def tearDown(self):
+        RecordCache.forceRefresh(False)
+        RecordCache.setTTL("appX", None)
+
+    def load(self):
+        self.loads += 1
+        return [{"id": "rec1", "loads": self.loads}]
+
+    def test_Cached(self):
+        k = RecordCache.key("appX", "Field", "all", ["ID"], "{ID}='a'")
+        self.assertEqual(RecordCache.cached(k, self.load), RecordCache.cached(k, self.load))
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(RecordCache.stats()["hits"], 1)
+
+        with mock.patch("time.monotonic", return_value=10**9):
+            RecordCache.cached(k, self.load)
+        self.assertEqual(self.loads, 2)
+
+    def test_CallersGetCopies(self):
+        k = RecordCache.key("appX", "Field", "all")
+        loaded = RecordCache.cached(k, self.load)
+        loaded[0]["loads"] = "changed"
+        first = RecordCache.cached(k, self.load)
+        first[0]["fields"] = {"ID": "changed"}
+        self.assertEqual(RecordCache.cached(k, self.load), [{"id": "rec1", "loads": 1}])
+
+    def test_TTLPerBase(self):
+        RecordCache.setTTL("appX", 0)
+        k = RecordCache.key("appX", "Field", "all")
+        RecordCache.cached(k, self.load)
+        RecordCache.cached(k, self.load)
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(RecordCache.ttl("appY"), RecordCache.TTL)
+
+    def test_RefreshAndInvalidate(self):
+        k = RecordCache.key("appX", "Field", "all")
+        RecordCache.cached(k, self.load)
+        RecordCache.forceRefresh()
+        self.assertEqual(RecordCache.cached(k, self.load)[0]["loads"], 2)
+        RecordCache.forceRefresh(False)
+        self.assertEqual(RecordCache.cached(k, self.load)[0]["loads"], 2)
+
+        # the flag is per thread
+        t = threading.Thread(target=RecordCache.forceRefresh)
+        t.start()
+        t.join()
+        self.assertFalse(RecordCache.refreshing())
+
+        RecordCache.invalidate("appX", "Model")
+        self.assertEqual(RecordCache.stats()["size"], 1)
+        RecordCache.invalidate("appX")
+        self.assertEqual(RecordCache.stats()["size"], 0)
+
+    def test_Bounded(self):
+        with mock.patch.object(RecordCache, "SIZE", 2):
+            for table in ("A", "B", "C"):
+                RecordCache.cached(RecordCache.key("appX", table, "all"), self.load)
+            self.assertEqual(RecordCache.stats()["size"], 2)
+            self.assertIsNone(RecordCache.get(RecordCache.key("appX", "A", "all")))
+
+
+if __name__ == "__main__":
+    unittest.main()
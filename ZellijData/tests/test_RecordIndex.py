@@ -0,0 +1,52 @@
+import threading
+import time
+import unittest
+
+from ZellijData import RecordIndex
+
+
+class TestRecordIndex(unittest.TestCase):
+    def setUp(self):
+        RecordIndex.clear()
+        self.loads = 0
+        self.ready = threading.Event()
+
+    def load(self):
+        self.ready.wait(1)
+        self.loads += 1
+        return [
+            {"id": "recAAAAAAAAAAAAAA", "fields": {"ID": "LAM.1"}},
+            {"id": "recBBBBBBBBBBBBBB", "fields": {"ID": "LAM.2"}},
+            {"id": "recCCCCCCCCCCCCCC", "fields": {}},
+        ]
+
+    def wait(self, index):
+        for _ in range(100):
+            if not index._refreshing:
+                return
+            time.sleep(0.01)
+
+    def test_BuiltInBackground(self):
+        index = RecordIndex.index("appX", "Model", self.load)
+        self.assertIs(RecordIndex.index("appX", "Model", self.load), index)
+        # not known until the first build is done
+        self.assertIsNone(index.lookup("LAM.1"))
+        self.ready.set()
+        self.wait(index)
+        self.assertEqual(index.lookup("LAM.2"), "recBBBBBBBBBBBBBB")
+        self.assertIsNone(index.lookup("LAM.3"))
+        self.assertEqual(self.loads, 1)
+
+        index.ttl = 0
+        self.assertEqual(index.lookup("LAM.1"), "recAAAAAAAAAAAAAA")
+        self.wait(index)
+        self.assertEqual(self.loads, 2)
+
+    def test_RecordId(self):
+        self.assertTrue(RecordIndex.isRecordId("recAAAAAAAAAAAAAA"))
+        self.assertFalse(RecordIndex.isRecordId("LAM.1"))
+        self.assertFalse(RecordIndex.isRecordId(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from unittest import mock
+
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from CRITERIA import criteria
+from ZellijData import FragmentCache, GraphPool
+from ZellijData.SingleGroupedItem import SingleGroupedItem
+
+PREFIXES = """@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+"""
+
+
+def field(i):
+    return (
+        f"<https://linked.art/example/actor/E39> crm:P1_is_identified_by <https://linked.art/example/name/{i}> .\n"
+        f'<https://linked.art/example/name/{i}> a crm:E41_Appellation ; rdfs:label "Name {i}" .'
+    )
+
+
+class TestGroupedGraphs(unittest.TestCase):
+    def setUp(self):
+        FragmentCache.clear()
+        self.item = SingleGroupedItem({"Name": "Actor", "Turtle RDF": PREFIXES})
+        for i in range(6):
+            self.item.addFields(f"rec{i}", {"Field": [f"F{i}"], "Turtle RDF": field(i)})
+        for record in self.item.GroupedData().values():
+            record["Group"] = "Names" if record.key < "rec3" else "Other names"
+        self.item.groupFields("Group")
+
+    def test_EachFieldParsedOnce(self):
+        self.item.generateTurtle()
+        self.assertIsNone(self.item.generateRDF())
+        for prefix in ("Names", "Other names"):
+            self.assertIn("graph TD", self.item.generateOntologyGraphForPrefix(prefix))
+            self.assertIn("_URI", self.item.generateInstanceGraphForPrefix(prefix))
+            self.assertIn("Name", self.item.generateJsonLDForPrefix(prefix))
+        # the prefixes, then each field
+        self.assertEqual(FragmentCache.stats()["misses"], 7)
+
+        turtle = self.item.generateTurtleForPrefix("Names").text()
+        graph = self.item.generateRDFForPrefix("Names").graph
+        self.assertTrue(isomorphic(graph, Graph().parse(data=turtle, format="turtle")))
+
+    def test_ItemRDFKeepsGroupOutputs(self):
+        ontology = self.item.generateOntologyGraphForPrefix("Names")
+        table = self.item.fieldTable()
+        self.assertIsNone(self.item.RDFerror)
+        self.assertIs(self.item.fieldTable(), table)
+        with mock.patch.object(criteria, "ontology") as render:
+            self.assertEqual(self.item.generateOntologyGraphForPrefix("Names"), ontology)
+        render.assert_not_called()
+
+    def test_GroupGraphsInPool(self):
+        serial = {p: self.item.generateOntologyGraphForPrefix(p) for p in ("Names", "Other names")}
+        self.item._forget()
+        self.item.groupFields("Group")
+        FragmentCache.clear()
+        with mock.patch.dict("os.environ", {"ZELLIJ_GRAPH_WORKERS": "2"}):
+            try:
+                for prefix, graph in serial.items():
+                    self.assertEqual(self.item.generateOntologyGraphForPrefix(prefix), graph)
+                self.assertIn("Name 4", self.item.generateJsonLDForPrefix("Other names"))
+            finally:
+                GraphPool.shutdown()
+        # parsed in the workers
+        self.assertEqual(FragmentCache.stats()["misses"], 0)
+
+    def test_OneWorkerIsInProcess(self):
+        with mock.patch.dict("os.environ", {"ZELLIJ_GRAPH_WORKERS": "1"}):
+            self.assertFalse(GraphPool.enabled())
+            with mock.patch.object(GraphPool, "pool") as pool:
+                self.assertIn("graph TD", self.item.generateOntologyGraphForPrefix("Names"))
+        pool.assert_not_called()
+        # parsed here: the prefixes and the group's three fields
+        self.assertEqual(FragmentCache.stats()["misses"], 4)
+
+    def test_GraphsAreLazy(self):
+        with mock.patch.object(criteria, "ontology", wraps=criteria.ontology) as ontology:
+            self.assertEqual(len(list(self.item.values())), 6)
+            self.assertEqual(FragmentCache.stats()["misses"], 0)
+            self.assertEqual(ontology.call_count, 0)
+
+            self.assertFalse(self.item.is_rdferror())
+            self.assertEqual(ontology.call_count, 0)
+            self.assertIn("graph TD", self.item.OntologyGraph)
+            self.assertIn("graph TD", self.item.OntologyGraph)
+            self.assertEqual(ontology.call_count, 1)
+
+    def test_ErrorNamesField(self):
+        self.item.addFields("bad", {"Field": ["Broken"], "Turtle RDF": "<a> <b> ."})
+        self.assertIn('the field "Broken"', self.item.RDFerror)
+        self.assertEqual(self.item.turtle(), "")
+
+
+class TestFields(unittest.TestCase):
+    def setUp(self):
+        self.item = SingleGroupedItem({"Name": "Actor"})
+        self.linked = {"id": "recM", "fields": {"ID": ["Model"], "Order": 2}}
+        self.item.addFields("rec1", {"GroupBy": "recG", "Field": ["F1"], "Model": [self.linked]})
+        self.item.addFields("rec2", {"Field": ["F2", "F3"], "Name": "Two"})
+
+    def test_NormalizedOnceForDisplay(self):
+        first = next(self.item.values())
+        self.assertEqual(first, {"Field": "F1", "Model": {"id": "recM", "fields": {"ID": "Model", "Order": 2}}})
+        self.assertIs(next(self.item.values()), first)
+        # the stored data is left as it came
+        record = self.item.GroupedData()["rec1"]
+        self.assertEqual(record["Field"], ["F1"])
+        self.assertEqual(self.linked["fields"]["ID"], ["Model"])
+        self.assertNotIn("GroupBy", record)
+
+        plain = self.item.GroupedData()["rec2"]
+        self.assertIs(plain.plain(), plain)
+        plain["Order"] = ["1"]
+        self.assertEqual(plain.plain()["Order"], "1")
+
+    def test_GroupFields(self):
+        self.assertEqual(self.item.groupFields(), [("default", list(self.item.GroupedData().values()))])
+        groups = self.item.groupFields("Model")
+        self.assertEqual([p for p, _ in groups], ["Model", "default"])
+        self.assertIs(self.item.GroupedFields(), groups)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from ZellijData.TurtleCodeBlock import TurtleCodeBlock
+
+FIELD = """@prefix crm: <http://www.cidoc-crm.org/cidoc-crm/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> . <a> rdfs:label "x" .
+<https://linked.art/example/actor/E39> a crm:E39_Actor ;  
+
+    crm:P14i_performed < > .
+"""
+
+
+class TestTurtleCodeBlock(unittest.TestCase):
+    def test_Tokenize(self):
+        block = TurtleCodeBlock(FIELD, FIELD)
+        self.assertEqual(len(block.prefix), 2)
+        self.assertEqual(block.body[0], ' <a> rdfs:label "x" .')
+        self.assertEqual(block.body[2], "    crm:P14i_performed <http://UNKNOWN> .")
+        self.assertEqual(len(block.body), 6)
+        self.assertEqual(
+            block.warnings[:3],
+            [
+                {"line": 2, "text": "Missing newline between prefix and body."},
+                {"line": 3, "text": "Trailing whitespace."},
+                {"line": 5, "text": "Empty URL reference < >"},
+            ],
+        )
+        self.assertIn(block.prefix[1] + "\n\n <a>", block.text())
+
+    def test_ExtendMatchesAdd(self):
+        added = TurtleCodeBlock(FIELD)
+        added.add(FIELD.replace("E39", "E40"))
+        extended = TurtleCodeBlock(FIELD).extend(TurtleCodeBlock(FIELD.replace("E39", "E40")))
+        self.assertEqual(extended.text(), added.text())
+        self.assertEqual(extended.warnings, added.warnings)
+        joined = TurtleCodeBlock(FIELD + "\n" + FIELD.replace("E39", "E40"))
+        self.assertEqual(extended.text(), joined.text())
+        self.assertEqual(extended.warnings, joined.warnings)
+
+    def test_TextFollowsChanges(self):
+        block = TurtleCodeBlock("<a> <b> <c> .", "<a> <b> <d> .")
+        self.assertTrue(block.text().endswith("<d> ."))
+        # same number of lines
+        block.body = ["<a> <b> <c> .", "<a> <b> <e> ."]
+        self.assertTrue(block.text().endswith("<e> ."))
+        block.body[1] = "<a> <b> <f> ."
+        block.changed()
+        self.assertTrue(block.text().endswith("<f> ."))
+
+
+if __name__ == "__main__":
+    unittest.main()
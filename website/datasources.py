@@ -20,11 +20,13 @@ from website.db import (
     dict_gen_one,
     encrypt,
     get_db,
+    has_cache_ttl,
     set_airtable_pattern,
 )
 from website.functions import functions
 
 # from ZellijTable.AggregateDataCollector import AggregateDataCollector
+from ZellijData import RecordCache
 from ZellijData.AirTableConnection import AirTableConnection
 
 bp = Blueprint("datasources", __name__, url_prefix="/datasources")
@@ -654,11 +656,14 @@ def airTableDatabaseCreateEdit(accountid=None, dbaseid=None):
         collection_base = request.form["collectionbase"]
         project_base = request.form["projectbase"]
         sparql_endpoint = request.form["sparqlendpoint"]
+        cache_ttl = request.form.get("cachettl") or None
 
         if not name:
             error = "A descriptive name is required."
         elif not key:
             error = "API Key is required."
+        elif cache_ttl is not None and not cache_ttl.isdigit():
+            error = "The cache TTL is a number of seconds."
         elif not key:
             c.execute(
                 "SELECT dbaseapikey FROM AirTableDatabases WHERE dbaseid=%s", (dbaseid,)
@@ -668,9 +673,13 @@ def airTableDatabaseCreateEdit(accountid=None, dbaseid=None):
                 error = "AirTable API key {} already exists.".format(key)
 
         if error is None:
+            cache_ttl_column = has_cache_ttl(db)
+            if not cache_ttl_column:
+                cache_ttl = None
             if dbaseid:
                 c.execute(
                     "UPDATE AirTableDatabases SET dbasename=%s, dbaseapikey=%s, githubrepo=%s, githubtoken=%s, githuborganization=%s, fieldbase=%s, collectionbase=%s, projectbase=%s, sparqlendpoint=%s"
+                    + (", cachettl=%s" if cache_ttl_column else "")
                     + " WHERE dbaseid=%s",
                     (
                         name,
@@ -682,13 +691,16 @@ def airTableDatabaseCreateEdit(accountid=None, dbaseid=None):
                         collection_base,
                         project_base,
                         sparql_endpoint,
-                        dbaseid,
-                    ),
+                    )
+                    + ((cache_ttl,) if cache_ttl_column else ())
+                    + (dbaseid,),
                 )
             else:
                 c.execute(
-                    "INSERT INTO AirTableDatabases (airtableaccountkey, dbasename, dbaseapikey, githubrepo, githubtoken, githuborganization, fieldbase, collectionbase, projectbase, sparqlendpoint)"
-                    + " VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                    "INSERT INTO AirTableDatabases (airtableaccountkey, dbasename, dbaseapikey, githubrepo, githubtoken, githuborganization, fieldbase, collectionbase, projectbase, sparqlendpoint"
+                    + (", cachettl)" if cache_ttl_column else ")")
+                    + " VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s"
+                    + (",%s)" if cache_ttl_column else ")"),
                     (
                         accountid,
                         name,
@@ -700,10 +712,13 @@ def airTableDatabaseCreateEdit(accountid=None, dbaseid=None):
                         collection_base,
                         project_base,
                         sparql_endpoint,
-                    ),
+                    )
+                    + ((cache_ttl,) if cache_ttl_column else ()),
                 )
 
             db.commit()
+            RecordCache.setTTL(key, cache_ttl)
+            RecordCache.invalidate(key)
             c.close()
             return redirect(url_for("datasources.connections"))
 
@@ -716,4 +731,6 @@ def airTableDatabaseCreateEdit(accountid=None, dbaseid=None):
         if "githubtoken" in existing:
             existing["githubtoken"] = decrypt(existing["githubtoken"])
     c.close()
-    return render_template("generator/airdbeditor.html", existing=existing)
+    return render_template(
+        "generator/airdbeditor.html", existing=existing, cache_ttl=has_cache_ttl(db)
+    )
@@ -4,6 +4,7 @@ Created on Mar. 11, 2021
 @author: Pete Harris
 """
 
+import logging
 import os
 from collections import OrderedDict
 from typing import Tuple
@@ -17,6 +18,7 @@ from flask import current_app, g
 from flask.cli import with_appcontext
 
 from website.DataScraper import DataScraper
+from ZellijData import RecordCache
 
 
 def get_db():
@@ -52,9 +54,48 @@ def init_db_command():
     click.echo("Initialized the database.")
 
 
+_cache_ttl_column = None
+
+
+def has_cache_ttl(db=None):
+    """
+    True when AirTableDatabases has the cachettl column; checked once per process.
+    Databases made before it existed get it from "flask migrate-db"; until then every
+    base has the default RecordCache TTL.
+    """
+    global _cache_ttl_column
+    if _cache_ttl_column is None:
+        c = (db or get_db()).cursor()
+        c.execute("SHOW COLUMNS FROM AirTableDatabases LIKE 'cachettl'")
+        _cache_ttl_column = c.fetchone() is not None
+        c.close()
+        if not _cache_ttl_column:
+            logging.warning(
+                "AirTableDatabases has no cachettl column; run 'flask migrate-db' to add it."
+            )
+    return _cache_ttl_column
+
+
+@click.command("migrate-db")
+@with_appcontext
+def migrate_db_command():
+    """Add the columns of the current schema.sql to an existing database."""
+    global _cache_ttl_column
+    db = get_db()
+    c = db.cursor()
+    c.execute("SHOW COLUMNS FROM AirTableDatabases LIKE 'cachettl'")
+    if c.fetchone() is None:
+        c.execute("ALTER TABLE AirTableDatabases ADD cachettl INTEGER")
+        click.echo("Added AirTableDatabases.cachettl.")
+    c.close()
+    _cache_ttl_column = True
+    click.echo("Migrated the database.")
+
+
 def init_app(app):
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_db_command)
 
     """ Original dict_gen from Python Essential Reference by David Beazley """
 
@@ -158,6 +199,7 @@ def generate_airtable_schema(apikey, db=None):
     for rec in dict_gen_many(c):
         if not secrettoken:
             secrettoken = rec["secrettoken"]
+            RecordCache.setTTL(apikey, rec.get("cachettl"))
         if rec["scrapername"] not in scrapers:
             scrapers[rec["scrapername"]] = {}
             scrapers[rec["scrapername"]]["id"] = rec["scraperkey"]
@@ -644,18 +644,11 @@ def patternitemdisplay(apikey, pattern):
     else:
         airtable.groupFields(item)
 
+    table = item.fieldTable()
     if not isinstance(prefill_data, str):
         for key, value in prefill_data.items():
             if value.get("sortable", False):
-                items = item._GroupedData
-                if all(
-                    [
-                        isinstance(x.get(key, False), str) and x.get(key, "").isdigit()
-                        for x in items.values()
-                    ]
-                ):
-                    for x in items.values():
-                        x[key] = int(x[key])
+                table.coerceNumeric(key)
 
     #### Fetch Collection Categories ####
 
@@ -684,10 +677,8 @@ def patternitemdisplay(apikey, pattern):
         for field in fields:
             field_data = field.get("fields", {})
             field_model_field = None
-            for key, val in item._GroupedData.items():
-                if val.get("Field", [None])[0] == field["id"]:
-                    field_model_field = key
-                    break
+            for val in table.select("Field", field["id"])[:1]:
+                field_model_field = val.key
 
             if field_model_field is None:
                 continue
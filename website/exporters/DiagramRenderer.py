@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from io import BytesIO
+
+CACHE_DIR = os.getenv("DIAGRAM_IMAGE_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "zellij-diagram-images"
+)
+
+
+class DiagramRenderer(ABC):
+    """Turns Mermaid text into PNG bytes for the PDF exports."""
+
+    name: str
+
+    @abstractmethod
+    def render(self, text: str, width: int, height: int) -> bytes | None:
+        """The PNG image, or None when the diagram could not be rendered."""
+        pass
+
+
+class MermaidInkRenderer(DiagramRenderer):
+    """Renders through mermaid-py, i.e. one round trip to mermaid.ink per diagram."""
+
+    name = "mermaid-ink"
+
+    def render(self, text: str, width: int, height: int) -> bytes | None:
+        import mermaid as md
+
+        mmd = md.Mermaid(text, width=width, height=height)
+        if not mmd.img_response.ok:
+            return None
+        return mmd.img_response.content
+
+
+class LocalRenderer(DiagramRenderer):
+    """
+    Offline stand-in for tests and benchmarks: a blank PNG of the requested size with the
+    first lines of the diagram written on it. Counts its calls in `calls`.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self.calls = 0
+
+    def render(self, text: str, width: int, height: int) -> bytes | None:
+        from PIL import Image, ImageDraw
+
+        self.calls += 1
+        image = Image.new("RGB", (max(width, 1), max(height, 1)), "white")
+        ImageDraw.Draw(image).multiline_text(
+            (10, 10), "\n".join(text.splitlines()[:40]), fill="black"
+        )
+        out = BytesIO()
+        image.save(out, format="PNG")
+        return out.getvalue()
+
+
+class CachedRenderer(DiagramRenderer):
+    """
+    Keeps the images of another renderer on disk, keyed by a hash of the diagram text,
+    the size and the renderer, so an unchanged diagram is never rendered twice.
+    Failed renders are not cached.
+    """
+
+    def __init__(self, renderer: DiagramRenderer, directory: str | None = None):
+        self.renderer = renderer
+        self.name = renderer.name
+        self.directory = directory or CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str, width: int, height: int) -> str:
+        h = hashlib.sha256(f"{self.renderer.name}\n{width}x{height}\n".encode("utf-8"))
+        h.update(text.encode("utf-8"))
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".png")
+
+    def render(self, text: str, width: int, height: int) -> bytes | None:
+        path = self.path(self.key(text, width, height))
+        try:
+            with open(path, "rb") as f:
+                image = f.read()
+            self.hits += 1
+            return image
+        except OSError:
+            pass
+
+        self.misses += 1
+        image = self.renderer.render(text, width, height)
+        if image:
+            self._write(path, image)
+        return image
+
+    def _write(self, path: str, image: bytes) -> None:
+        # Written under a temporary name, then renamed, so concurrent exports never
+        # read half an image. A cache that cannot be written only costs a re-render.
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(image)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+RENDERERS = {
+    MermaidInkRenderer.name: MermaidInkRenderer,
+    LocalRenderer.name: LocalRenderer,
+}
+
+
+def get_renderer(name: str | None = None) -> DiagramRenderer:
+    """The disk-cached renderer named by `name`, else by DIAGRAM_RENDERER (default mermaid-ink)."""
+    name = name or os.getenv("DIAGRAM_RENDERER") or MermaidInkRenderer.name
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown diagram renderer: {name}")
+    return CachedRenderer(RENDERERS[name]())
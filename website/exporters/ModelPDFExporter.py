@@ -3,7 +3,6 @@ import os
 from datetime import date
 from io import BytesIO
 
-import mermaid as md
 from fpdf import Align
 from fpdf.enums import TextEmphasis
 from pyairtable.formulas import EQ, OR, FunctionCall, match
@@ -11,6 +10,7 @@ from typing_extensions import override
 
 from website.datasources import AirTableConnection, get_prefill
 from website.db import get_schema_from_api_key
+from website.exporters.DiagramRenderer import DiagramRenderer, get_renderer
 from website.exporters.PDFExporter import PDFExporter
 from website.functions import generate_ontology_graph
 from ZellijData.TurtleCodeBlock import TurtleCodeBlock
@@ -19,8 +19,15 @@ BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 
 
 class ModelPDFExporter(PDFExporter):
-    schemas = {}
     fields = {}
+    _renderer: DiagramRenderer | None = None
+
+    @property
+    def renderer(self) -> DiagramRenderer:
+        # resolved on first use, so a bad DIAGRAM_RENDERER only fails the PDF export
+        if type(self)._renderer is None:
+            type(self)._renderer = get_renderer()
+        return type(self)._renderer
 
     def __init__(self, id: str, pattern: str, model_id: str):
         if not id:
@@ -177,14 +184,35 @@ class ModelPDFExporter(PDFExporter):
             ),
         )
 
+    def _resolve_links(self, data: list[dict]) -> dict:
+        """
+        Fetch the linked records of a section together, per linked table, into self.fields;
+        returns {field: linked table id} of the low table's record link fields.
+        """
+        schema = self.airtable.get_table_schema(self.scraper["low_table"])
+        linked = {
+            f.name: f.options.linked_table_id
+            for f in schema.fields
+            if f.type == "multipleRecordLinks"
+        }
+        ids = {}
+        for entry in data:
+            for field_key, table_id in linked.items():
+                cell = entry.get(field_key, "")
+                for rec in cell if isinstance(cell, list) else [cell]:
+                    if isinstance(rec, str) and rec.startswith("rec"):
+                        if rec not in self.fields:
+                            ids.setdefault(table_id, []).append(rec)
+        for table_id, record_ids in ids.items():
+            self.fields.update(self.airtable.get_records_by_id(table_id, record_ids))
+        return linked
+
     def _generate_fields_sub_section(self, title: str, data: dict) -> None:
         self.sub_section(f"{title}: Fields")
         self.div(f"{title}: Fields", align=Align.C, decoration=TextEmphasis.B)
+        linked = self._resolve_links(data)
         rows = []
 
-        if self.sort_key:
-            data = sorted(data, key=lambda x: x.get(self.sort_key, 0))
-
         for entry in data:
             if len(rows) == 0:
                 rows.append(
@@ -228,23 +256,12 @@ class ModelPDFExporter(PDFExporter):
                 elif not isinstance(field, str):
                     field = str(field)
 
-                if field.startswith("rec"):
-                    if self.scraper["low_table"] not in self.schemas:
-                        self.schemas[self.scraper["low_table"]] = (
-                            self.airtable.airtable.table(
-                                base_id=self.id, table_name=self.scraper["low_table"]
-                            ).schema()
-                        )
-                    schema = self.schemas[self.scraper["low_table"]]
-                    for f in schema.fields:
-                        if f.name == field_key and f.type == "multipleRecordLinks":
-                            if field not in self.fields:
-                                self.fields[field] = self.airtable.airtable.table(
-                                    base_id=self.id,
-                                    table_name=f.options.linked_table_id,
-                                ).get(field)
-
-                            field = self.fields[field].get("fields").get("UI_Name", "")
+                if field.startswith("rec") and field_key in linked:
+                    field = ", ".join(
+                        self.fields[rec].get("fields", {}).get("UI_Name", "")
+                        for rec in field.split(", ")
+                        if rec in self.fields
+                    )
 
                 if len(field) > 100:
                     field = field[:97] + "..."
@@ -280,14 +297,14 @@ class ModelPDFExporter(PDFExporter):
         except Exception:
             return
 
-        mmd = md.Mermaid(
+        image = self.renderer.render(
             criteria,
             width=math.floor(self.pdf.w - 20) * 8,
             height=math.floor(self.pdf.h - 60) * 8,
         )
-        if mmd.img_response.ok:
+        if image:
             self.pdf.image(
-                BytesIO(mmd.img_response.content),
+                BytesIO(image),
                 x=10,
                 y=20,
                 w=self.pdf.w - 20,
@@ -323,7 +340,8 @@ class ModelPDFExporter(PDFExporter):
     @override
     def generate_content(self) -> None:
         self._metadata_section()
-        for key, val in self.data["item"].GroupedFields():
+        # each group sorted by self.sort_key, from the item's field table
+        for key, val in self.data["item"].GroupedFields(getattr(self, "sort_key", None)):
             if key == "default":
                 key = "Deneral"
             self._generate_category_section(key, val)
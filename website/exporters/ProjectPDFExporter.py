@@ -81,6 +81,30 @@ class ProjectPDFExporter(PDFExporter):
         else:
             raise ValueError(f"Unknown section title: {title}")
 
+    def _resolve_links(
+        self, table_name: str, data: list[dict], configuration: dict
+    ) -> None:
+        """Fetch the linked records of a section together, per linked table, into self.fields."""
+        if table_name not in self.schemas:
+            self.schemas[table_name] = self.airtable.airtable.table(
+                base_id=self.id, table_name=table_name
+            ).schema()
+
+        for f in self.schemas[table_name].fields:
+            if f.name not in configuration or f.type != "multipleRecordLinks":
+                continue
+            ids = []
+            for data_row in data:
+                cell = data_row.get(f.name, "")
+                for rec in cell if isinstance(cell, list) else [cell]:
+                    if isinstance(rec, str) and rec.startswith("rec"):
+                        if rec not in self.fields:
+                            ids.append(rec)
+            if ids:
+                self.fields.update(
+                    self.airtable.get_records_by_id(f.options.linked_table_id, ids)
+                )
+
     def _render_section(
         self,
         title: str,
@@ -97,6 +121,8 @@ class ProjectPDFExporter(PDFExporter):
             self.div("No models found.", align=Align.C)
             return
 
+        self._resolve_links(table_name, data, configuration)
+
         rows = [tuple(configuration.values())]
         for data_row in data:
             row = []
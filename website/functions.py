@@ -8,33 +8,33 @@ from ZellijData.TurtleCodeBlock import TurtleCodeBlock
 bp = Blueprint("functions", __name__, url_prefix="/functions")
 
 
-def generate_ontology_graph(rdf) -> str:
-    rdf = RDFCodeBlock(rdf)
-
+def generate_ontology_graph(rdf, full=False) -> str:
+    # Oversized diagrams are summarized unless the full detail is asked for.
     try:
-        return criteria.ontology(rdf.turtle())
+        return criteria.ontology(rdf, budget=None if full else criteria.BUDGET)
     except Exception as e:
         return "ERROR: " + str(e)
 
 
 @bp.route("/ontology", methods=["POST"])
 def generate_ontology_graph_route():
-    return generate_ontology_graph(request.form["turtle_text"])
+    return generate_ontology_graph(request.form["turtle_text"], full=bool(request.form.get("full")))
 
 
 @bp.route("/instance", methods=["POST"])
 def generate_instance_graph():
-    rdf = RDFCodeBlock(request.form["turtle_text"])
-
+    full = bool(request.form.get("full"))
     try:
-        return criteria.instance(rdf.turtle())
+        return criteria.instance(
+            request.form["turtle_text"], budget=None if full else criteria.BUDGET
+        )
     except Exception as e:
         return str(e)
 
 
 @bp.route("/jsonld", methods=["POST"])
 def generate_json_ld():
-    rdf = RDFCodeBlock(request.form["turtle_text"])
+    rdf = RDFCodeBlock(request.form["turtle_text"], readonly=True)
 
     try:
         return rdf.jsonld()
@@ -94,7 +94,7 @@ def display_graph(prefix, input, item, categories):
     turtle = TurtleCodeBlock(allturtle)
     graphs["turtle_text"] = turtle.text()
     try:
-        rdf = RDFCodeBlock(turtle.text())
+        rdf = RDFCodeBlock(turtle.text(), readonly=True)
         graphs["rdf"] = rdf
     except BadSyntax as bs:
         rdf = str(bs)
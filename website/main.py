@@ -47,6 +47,15 @@ def create_app(test_config=None):
 
     db.init_app(app)
 
+    from flask import request
+
+    from ZellijData import RecordCache
+
+    @app.before_request
+    def airtable_refresh():
+        # "?refresh=1" fetches everything the request needs from AirTable again
+        RecordCache.forceRefresh(request.args.get("refresh", "") not in ("", "0"))
+
     from . import auth
 
     app.register_blueprint(auth.bp)
@@ -80,6 +89,11 @@ def create_app(test_config=None):
 
     app.register_blueprint(functions.bp)
 
+    # Load the CRITERIA class index and templates now rather than on the first diagram request.
+    from CRITERIA import criteria
+
+    criteria.warm()
+
     return app
 
 
@@ -37,6 +37,7 @@ CREATE TABLE AirTableDatabases (
 	airtableaccountkey INTEGER,
 	dbasename TEXT NOT NULL,
 	dbaseapikey CHAR(24) NOT NULL,
+	cachettl INTEGER,
     
     INDEX airtablesort ( airtableaccountkey, dbasename(24) ),
     
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from website.exporters.DiagramRenderer import CachedRenderer, LocalRenderer, get_renderer
+
+DIAGRAM = "graph TD\nA[Actor] -->|P14| B[Production]\n"
+
+
+class TestCachedRenderer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.local = LocalRenderer()
+        self.renderer = CachedRenderer(self.local, self.tmp)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_UnchangedDiagramIsRenderedOnce(self):
+        first = self.renderer.render(DIAGRAM, 200, 100)
+        self.assertTrue(first.startswith(b"\x89PNG"))
+        # a new renderer on the same directory, as in a later export
+        again = CachedRenderer(self.local, self.tmp)
+        self.assertEqual(again.render(DIAGRAM, 200, 100), first)
+        self.assertEqual(self.local.calls, 1)
+        self.assertEqual((again.hits, again.misses), (1, 0))
+
+    def test_KeyedByTextAndSize(self):
+        self.renderer.render(DIAGRAM, 200, 100)
+        self.renderer.render(DIAGRAM, 400, 100)
+        self.renderer.render(DIAGRAM + "B --> C\n", 200, 100)
+        self.assertEqual(self.local.calls, 3)
+        self.assertEqual(len(os.listdir(self.tmp)), len({
+            self.renderer.key(DIAGRAM, 200, 100)[:2],
+            self.renderer.key(DIAGRAM, 400, 100)[:2],
+            self.renderer.key(DIAGRAM + "B --> C\n", 200, 100)[:2],
+        }))
+
+    def test_UnknownRenderer(self):
+        self.assertEqual(get_renderer("local").name, "local")
+        with self.assertRaises(ValueError):
+            get_renderer("nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,6 +27,7 @@ from website.auth import login_required
 from rdflib import Graph
 
 from rdflib.plugins.parsers.notation3 import BadSyntax
+from ZellijData import JsonLDContext
 from shutil import make_archive, rmtree
 
 bp = Blueprint("tools", __name__)
@@ -212,10 +213,7 @@ def _rdf_to_json(filehandle):
     try:
         graph = Graph()
         graph.parse(filehandle, format="turtle")
-        out = graph.serialize(
-            format="json-ld", context="https://linked.art/ns/v1/linked-art.json"
-        )
-        out = out.decode("utf-8")
+        out = JsonLDContext.serialize(graph)
         return True, out
 
     except BadSyntax as bs:
@@ -260,7 +258,15 @@ def formatRDFerror(err, name=None):
     pre.append((str(err.lines), s[ln_1begin + 1 : ln_1begin + 1 + ln_1len]))
     indent = i - ln0begin
 
-    htm = '<p class="error">When trying to parse this RDF, the code reported the following error:</p>\n'
+    field = getattr(err, "field", None)  # set by ZellijData.FragmentCache
+    if field:
+        htm = (
+            '<p class="error">When trying to parse the RDF of the field "'
+            + html.escape(field)
+            + '", the code reported the following error:</p>\n'
+        )
+    else:
+        htm = '<p class="error">When trying to parse this RDF, the code reported the following error:</p>\n'
     htm += "<pre>\n"
     txt = "ERROR" + (' in "' + name + '"' if name else "") + ":\n"
     for x in pre:
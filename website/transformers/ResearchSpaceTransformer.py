@@ -186,9 +186,9 @@ class ResearchSpaceTransformer(Transformer):
                 )
 
         try:
-            self.airtable.airtable.table(
-                base_id=base_api_key, table_name=table_name
-            ).update(base_field.get("id"), {column_name: self.content})
+            self.airtable.update_record(
+                table_name, base_field.get("id"), {column_name: self.content}, base=base_api_key
+            )
         except Exception as e:
             print("Error uploading RS Definition: ", e)
             raise e
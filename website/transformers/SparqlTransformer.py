@@ -180,9 +180,9 @@ class SparqlTransformer(Transformer):
         )
 
         try:
-            self.airtable.airtable.table(
-                base_id=base_api_key, table_name="Field"
-            ).update(base_field.get("id"), {"SparQL": where_text})
+            self.airtable.update_record(
+                "Field", base_field.get("id"), {"SparQL": where_text}, base=base_api_key
+            )
         except Exception as e:
             print("Error uploading Sparql: ", e)
             raise e
@@ -87,7 +87,6 @@ class Transformer(ABC):
                     airtable_conn.get_record_by_formula(table, match({"ID": item}))
                 )
         else:
-            for record in item:
-                records.append(airtable_conn.get_record_by_id(table, record))
+            records.extend(airtable_conn.get_records_by_id(table, item).values())
 
         return list(filter(lambda x: x, records))
@@ -104,9 +104,9 @@ class TurtleTransformer:
                 )
 
         try:
-            self.airtable.airtable.table(
-                base_id=base_api_key, table_name="Field"
-            ).update(base_field.get("id"), {"Turtle_Representation": escaped_ttl})
+            self.airtable.update_record(
+                "Field", base_field.get("id"), {"Turtle_Representation": escaped_ttl}, base=base_api_key
+            )
         except Exception as e:
             print("Error uploading Turtle: ", e)
             raise e